@@ -1,3 +1,4 @@
+import argparse
 import subprocess
 import sys
 import time
@@ -5,6 +6,8 @@ import re
 import os
 from search.minmax import Minmax
 from game.board import ChessBoard
+from game import rules
+from game.moves import move_to_str, move_from_str
 from search.ai_agent import AIAgent
 
 # ANSI color codes for terminal
@@ -78,37 +81,15 @@ def print_final_board(board, winner):
 
 def check_win_condition(board, current_player):
     """
-    Check if the game has been won
+    Check if the game has been won, with the same rules the engine searches with
     1. If one player has no pieces left
     2. If a player's piece reaches the opponent's side (row 0 for white, row 7 for black)
+    3. If the player to move has no legal moves
+
+    :param current_player: The player whose turn it is now
+    :return: 'W' or 'B' for the winner, None if the game goes on
     """
-    white_pieces = 0
-    black_pieces = 0
-    white_reached_top = False
-    black_reached_bottom = False
-    
-    for row in range(8):
-        for col in range(8):
-            piece = board.boardArray[row][col]
-            if piece == 'W':
-                white_pieces += 1
-                if row == 0:
-                    white_reached_top = True
-            elif piece == 'B':
-                black_pieces += 1
-                if row == 7:
-                    black_reached_bottom = True
-    
-    if white_pieces == 0:
-        return 'B'
-    elif black_pieces == 0:
-        return 'W'
-    elif white_reached_top:
-        return 'W'
-    elif black_reached_bottom:
-        return 'B'
-    
-    return None
+    return rules.winner(board.white, board.black, current_player, board.ep_square)
 
 def print_win_message(winner):
     """Print a message indicating which player has won"""
@@ -124,11 +105,16 @@ def print_win_message(winner):
 def main():
     """Main function to play against the external EXE"""
 
-    if len(sys.argv) < 2:
-        print(f"{Colors.BRIGHT_RED}Usage: python play_against_exe.py <path_to_exe>{Colors.RESET}")
-        return
-        
-    exe_path = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Two Flags Game - AI vs External Agent')
+    parser.add_argument('exe_path', help='Path to the external agent executable')
+    parser.add_argument('--algorithm', default='minmax', choices=list(AIAgent.ALGORITHMS),
+                        help='Algorithm for the AI (minmax, pvs or mcts)')
+    parser.add_argument('--stats', action='store_true', help='Print the search statistics after every AI move')
+    parser.add_argument('--stats-log', metavar='FILE',
+                        help='Append the search statistics of every AI move to FILE as JSON lines')
+    args = parser.parse_args()
+
+    exe_path = args.exe_path
     
     print(f"{Colors.BRIGHT_CYAN}=== Two Flags Game - AI vs External Agent ==={Colors.RESET}")
     
@@ -160,7 +146,8 @@ def main():
         time_prompt = read_until_prompt(process, "minutes")
         send_command(process, time_limit)
         
-        ai_agent = AIAgent(algorithm="minmax", time_limit_minutes=int(time_limit))
+        ai_agent = AIAgent(algorithm=args.algorithm, time_limit_minutes=int(time_limit),
+                           stats=args.stats, stats_log=args.stats_log)
         
         player_color = 'W' if color_choice == "1" else 'B'
         opponent_color = 'B' if player_color == 'W' else 'W'
@@ -191,14 +178,12 @@ def main():
                 # AI picks White's move
                 # -------------------------------------------
                 print("_____________________________________________________________________________________")
-                move_str = ai_agent.get_move(board, player_color)
+                move = ai_agent.choose_move(board, player_color)
+                if move is None:
+                    move = move_from_str("a2a3" if player_color == 'W' else "a7a6")
+                move_str = move_to_str(move)
                 print(f"{Colors.BRIGHT_GREEN}Your agent move is: {colorize_move(move_str)}{Colors.RESET}")
                 
-                from_col = ord(move_str[0]) - ord('a')
-                from_row = 8 - int(move_str[1])
-                to_col = ord(move_str[2]) - ord('a')
-                to_row = 8 - int(move_str[3])
-                move = (from_row, from_col, to_row, to_col)
                 board.computeMove(move, player_color)
                 
                 print_chess_board(board)
@@ -291,14 +276,12 @@ def main():
                 # AI picks Black's move
                 # -------------------------------------------
                 print("_____________________________________________________________________________________")
-                move_str = ai_agent.get_move(board, player_color)
+                move = ai_agent.choose_move(board, player_color)
+                if move is None:
+                    move = move_from_str("a2a3" if player_color == 'W' else "a7a6")
+                move_str = move_to_str(move)
                 print(f"{Colors.BRIGHT_GREEN}Your agent move is: {colorize_move(move_str)}{Colors.RESET}")
                 
-                from_col = ord(move_str[0]) - ord('a')
-                from_row = 8 - int(move_str[1])
-                to_col = ord(move_str[2]) - ord('a')
-                to_row = 8 - int(move_str[3])
-                move = (from_row, from_col, to_row, to_col)
                 board.computeMove(move, player_color)
                 
                 print_chess_board(board)
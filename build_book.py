@@ -0,0 +1,106 @@
+"""
+Build the opening book (see search/book.py).
+
+Walks the opening tree from the game's setup for --plies plies. For each
+colour's book, positions where that colour is to move are searched for
+--time seconds and only the chosen move is followed, while every reply of
+the other colour is followed, so the book has an answer to whatever the
+opponent plays. The positions of a ply are searched in parallel over
+--workers processes. Examples:
+
+    python build_book.py --plies 4 --time 2
+    python build_book.py --plies 6 --time 5 --workers 8
+"""
+
+import time
+import argparse
+import multiprocessing
+from game.board import ChessBoard, STANDARD_SETUP
+from search.book import DEFAULT_PATH, OpeningBook, write_book
+from search.negamax import Negamax
+
+# Search engine of a worker process, kept between positions for its transposition table
+_engine = None
+
+
+def _init_worker(move_time, tt_size_mb):
+    global _engine
+    _engine = Negamax(tt_size_mb=tt_size_mb)
+    _engine.move_time = move_time
+
+
+def _search(position):
+    """(key, move, depth searched) for one position"""
+    move = _engine.get_best_move(position, position.side_to_move)
+    return position.key, move, _engine.max_depth_reached
+
+
+def build(setup, plies, move_time, workers, tt_size_mb=64):
+    """
+    Search the opening tree.
+
+    :return: List of (key, move, weight) book entries
+    """
+    board = ChessBoard()
+    board.load_setup(setup)
+
+    # Positions of the current ply => colours whose book reaches them
+    frontier = {board.to_position(): {'W', 'B'}}
+    chosen = {}  # Zobrist key => (move, depth)
+    start = time.time()
+
+    pool = multiprocessing.Pool(workers, _init_worker, (move_time, tt_size_mb)) if workers > 1 else None
+    if pool is None:
+        _init_worker(move_time, tt_size_mb)
+    try:
+        for ply in range(plies):
+            frontier = {position: books for position, books in frontier.items()
+                        if position.terminal_status() is None}
+            to_search = [position for position, books in frontier.items()
+                         if position.side_to_move in books and position.key not in chosen]
+            print(f"[{time.time() - start:7.1f}s] Ply {ply + 1}: searching {len(to_search)} positions...")
+            results = pool.map(_search, to_search) if pool else map(_search, to_search)
+            for key, move, depth in results:
+                if move is not None:
+                    chosen[key] = (move, depth)
+
+            next_frontier = {}
+            for position, books in frontier.items():
+                book_move = chosen.get(position.key, (None, 0))[0]
+                for move in position.generate_moves():
+                    # A colour's book only goes on with the move it would play itself
+                    child_books = {colour for colour in books
+                                   if colour != position.side_to_move or move == book_move}
+                    if child_books:
+                        next_frontier.setdefault(position.play(move), set()).update(child_books)
+            frontier = next_frontier
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return [(key, move, depth) for key, (move, depth) in chosen.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Two Flags Game - opening book builder')
+    parser.add_argument('--plies', type=int, default=4, help='Depth of the opening tree in plies')
+    parser.add_argument('--time', type=float, default=2.0, help='Search time per position in seconds')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='Search processes (default: one per CPU core)')
+    parser.add_argument('--setup', default=STANDARD_SETUP, help='Board setup string (default: standard start)')
+    parser.add_argument('--output', default=DEFAULT_PATH, help=f'Book file (default: {DEFAULT_PATH})')
+    args = parser.parse_args()
+
+    start = time.time()
+    entries = build(args.setup, args.plies, args.time, max(1, args.workers))
+    write_book(args.output, entries)
+
+    book = OpeningBook(args.output)
+    print(f"Wrote {args.output} ({book.entries} positions) in {time.time() - start:.1f}s")
+    book.close()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,40 @@
+"""
+Build the pawn-endgame tablebase (see search/tablebase.py).
+
+Solves every position with up to --max-pawns pawns per side and writes the
+file the AI memory-maps at startup. Examples:
+
+    python build_tablebase.py
+    python build_tablebase.py --max-pawns 1 --output tables/small.tb
+
+Two pawns per side takes well under a minute and 2.7 MB; every extra pawn
+multiplies both by about 200.
+"""
+
+import time
+import argparse
+from search.tablebase import DEFAULT_PATH, Tablebase, generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Two Flags Game - pawn endgame tablebase generator')
+    parser.add_argument('--max-pawns', type=int, default=2, help='Pawns per side to solve up to')
+    parser.add_argument('--output', default=DEFAULT_PATH, help=f'Tablebase file (default: {DEFAULT_PATH})')
+    args = parser.parse_args()
+    if args.max_pawns < 1:
+        parser.error("--max-pawns must be at least 1")
+
+    start = time.time()
+
+    def report(white_count, black_count):
+        print(f"[{time.time() - start:7.1f}s] Solving {white_count} white vs {black_count} black pawns...")
+
+    generate(args.output, args.max_pawns, progress=report)
+
+    tablebase = Tablebase(args.output)
+    print(f"Wrote {args.output} (up to {tablebase.max_pawns} pawns per side) in {time.time() - start:.1f}s")
+    tablebase.close()
+
+
+if __name__ == "__main__":
+    main()
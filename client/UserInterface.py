@@ -1,6 +1,7 @@
 import pygame
 import math
 import time
+from game.moves import move_to_coords
 
 class UserInterface:
     def __init__(self, surface, chessboard):
@@ -103,7 +104,7 @@ class UserInterface:
         
         # Try to determine the winning square for highlighting
         if not self.winning_square and self.chessboard.last_move:
-            from_row, from_col, to_row, to_col = self.chessboard.last_move
+            from_row, from_col, to_row, to_col = move_to_coords(self.chessboard.last_move)
             target_row = 0 if winner == 'W' else 7
             if to_row == target_row:
                 self.winning_square = (to_row, to_col)
@@ -434,7 +435,7 @@ class UserInterface:
             return None
         else:
             if (row, col) in self.valid_moves:
-                move = [self.selected_piece[0], self.selected_piece[1], row, col]
+                move = self.chessboard.encode_move((self.selected_piece[0], self.selected_piece[1], row, col))
                 self.chessboard.computeMove(move, self.playerColor)
                 self.selected_piece = None
                 self.valid_moves = []
@@ -466,7 +467,7 @@ class UserInterface:
             # If winning square wasn't set by get_win_reason, try to infer it from the last move
             if not self.winning_square and self.chessboard.last_move:
                 target_row = 0 if winner == 'W' else 7
-                _, _, to_row, to_col = self.chessboard.last_move
+                _, _, to_row, to_col = move_to_coords(self.chessboard.last_move)
                 if to_row == target_row:
                     self.winning_square = (to_row, to_col)
 
@@ -2,15 +2,18 @@ import sys
 import socket
 import threading
 import queue
-import time
 import pygame
 import argparse
 from game.board import ChessBoard
 from client.UserInterface import UserInterface
-from search.ai_agent import AIAgent  # Import the AI agent
+from game.moves import move_to_str, move_from_str
+from search.ai_agent import AIAgent, SearchLimits  # Import the AI agent
+
+# Seconds left on the AI's clock at which its search is stopped and the best move so far played
+FORCE_MOVE_SECONDS = 1.0
 
 class GameClient:
-    def __init__(self, use_ai=False, ai_algorithm="minmax"):
+    def __init__(self, use_ai=False, ai_algorithm="minmax", ponder=False):
         self.socket = socket.socket()
         self.time = 0
         self.color = None
@@ -25,6 +28,9 @@ class GameClient:
         self.use_ai = use_ai
         self.ai_agent = None
         self.ai_algorithm = ai_algorithm
+        self.ponder = ponder
+        self.ai_search = None  # Search for our move running in the background
+        self.my_time_left = None  # Seconds, from the server's TIMER messages
         
     def connect_to_server(self, host="localhost", port=9999):
         try:
@@ -98,6 +104,14 @@ class GameClient:
                     black_time = int(parts[2].split(':')[1])
                     self.UI.update_times(white_time, black_time)
 
+                    # Keep the AI's time budget on the server's clock
+                    self.my_time_left = white_time if self.color == 'W' else black_time
+                    if self.ai_agent:
+                        self.ai_agent.update_clock(self.my_time_left)
+                    if self.ai_search is not None and self.my_time_left <= FORCE_MOVE_SECONDS:
+                        # Out of time: play the best move found so far rather than lose on the clock
+                        self.ai_search.stop()
+
                 elif data.startswith("Setup"):
                     self.handle_setup(data)
                     self.socket.send(str.encode("OK"))
@@ -161,6 +175,10 @@ class GameClient:
     def handle_game_over(self, winner):
         """Handle game over with proper win/loss messages and auto-close"""
         self.game_over = True
+        if self.ai_agent:
+            self.ai_agent.stop_search()
+            self.ai_agent.stop_pondering()
+        self.ai_search = None
         
         # Set the game over state in the UI
         self.UI.set_game_over(winner)
@@ -199,26 +217,32 @@ class GameClient:
 
 
     def make_ai_move(self):
-        """Have the AI agent make a move"""
-        if not self.ai_agent or not self.is_my_turn or self.game_over:
+        """
+        Have the AI agent start searching for a move; the search runs in the
+        background while messages and events are handled, and
+        finish_ai_move plays its result
+        """
+        if not self.ai_agent or not self.is_my_turn or self.game_over or self.ai_search is not None:
             return
-            
-        # Small delay to make the AI's move visible to the user
-        time.sleep(0.5)
-        
-        # Get best move from AI
-        move_str = self.ai_agent.get_move(self.UI.chessboard, self.color)
+        self.ai_search = self.ai_agent.start_search(self.UI.chessboard, SearchLimits(time_left=self.my_time_left),
+                                                    player_color=self.color)
+
+    def finish_ai_move(self):
+        """Play the AI's move once its search is done"""
+        if self.ai_search is None or not self.ai_search.done():
+            return
+        search, self.ai_search = self.ai_search, None
+        if self.game_over:
+            return
+        move = search.result()
+        if move is None:
+            print(f"AI ({self.color}) has no moves")
+            return
+        move_str = move_to_str(move)
         print(f"AI move: {move_str}")
         
-        # Convert algebraic notation to board coordinates
-        from_col = ord(move_str[0]) - ord('a')
-        from_row = 8 - int(move_str[1])
-        to_col = ord(move_str[2]) - ord('a')
-        to_row = 8 - int(move_str[3])
-        
         # Execute the move locally
-        move_coords = [from_row, from_col, to_row, to_col]
-        self.UI.chessboard.computeMove(move_coords, self.color)
+        self.UI.chessboard.computeMove(move, self.color)
         
         # Check for win condition
         if self.UI.chessboard.check_win(self.color):
@@ -240,27 +264,23 @@ class GameClient:
         self.UI.active_timer = opponent_color
         self.UI.display_turn_message("Opponent's turn")
 
+        # Keep searching on the opponent's clock; the next make_ai_move picks it up
+        if self.ponder:
+            self.ai_agent.start_pondering(self.UI.chessboard, self.color)
+
     def handle_setup(self, data):
-        parts = data.split()[1:]  # Skip "Setup" command
-        self.UI.chessboard.clear_board()
-        
-        for part in parts:
-            color = part[0]
-            col = ord(part[1].lower()) - ord('a')
-            row = 8 - int(part[2])
-            self.UI.chessboard.boardArray[row][col] = color
+        self.UI.chessboard.load_setup(data)
         
         self.UI.drawComponent()
 
     def handle_opponent_move(self, move):
-        from_col = ord(move[0]) - ord('a')
-        from_row = 8 - int(move[1])
-        to_col = ord(move[2]) - ord('a')
-        to_row = 8 - int(move[3])
-        
-        move_coords = [from_row, from_col, to_row, to_col]
+        move_int = move_from_str(move)
+        if move_int is None:
+            print(f"Ignoring malformed move: {move}")
+            return
+
         opponent_color = 'B' if self.color == 'W' else 'W'
-        self.UI.chessboard.computeMove(move_coords, opponent_color)
+        self.UI.chessboard.computeMove(move_int, opponent_color)
         
         # Check if opponent has won
         if self.UI.chessboard.check_win(opponent_color):
@@ -287,12 +307,7 @@ class GameClient:
                 move = self.UI.handle_click(pos)
                 if move:
                     # Create algebraic notation move string
-                    move_str = (
-                        chr(ord('a') + move[1]) +
-                        str(8 - move[0]) +
-                        chr(ord('a') + move[3]) +
-                        str(8 - move[2])
-                    )
+                    move_str = move_to_str(move)
                     
                     # Check for win condition
                     if self.UI.chessboard.check_win(self.color):
@@ -330,6 +345,7 @@ class GameClient:
             while self.running:
                 self.handle_events()
                 self.process_messages()
+                self.finish_ai_move()
                 self.UI.drawComponent()
                 clock.tick(60)  # 60 FPS
 
@@ -337,6 +353,9 @@ class GameClient:
             print(f"Error in game: {e}")
         finally:
             print("Cleaning up...")
+            if self.ai_agent:
+                self.ai_agent.stop_search()
+                self.ai_agent.stop_pondering()
             if self.socket:
                 try:
                     self.socket.send(str.encode("exit"))
@@ -351,12 +370,14 @@ def main():
     parser.add_argument('--host', default='localhost', help='Server host')
     parser.add_argument('--port', type=int, default=9999, help='Server port')
     parser.add_argument('--ai', action='store_true', help='Enable AI player')
-    parser.add_argument('--algorithm', default='minmax', choices=['minmax'], 
-                        help='AI algorithm to use (only minmax is supported)')
+    parser.add_argument('--algorithm', default='minmax', choices=list(AIAgent.ALGORITHMS), 
+                        help='AI algorithm to use (minmax, pvs or mcts)')
+    parser.add_argument('--ponder', action='store_true',
+                        help="Let the AI keep searching on the opponent's time")
     
     args = parser.parse_args()
     
-    client = GameClient(use_ai=args.ai, ai_algorithm=args.algorithm)
+    client = GameClient(use_ai=args.ai, ai_algorithm=args.algorithm, ponder=args.ponder)
     client.run()
 
 
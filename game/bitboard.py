@@ -0,0 +1,139 @@
+"""
+Bitboard primitives for the Two Flags board.
+
+Squares are numbered the same way boardArray is indexed: square = row * 8 + col,
+so bit 0 is a8 (row 0, col 0) and bit 63 is h1 (row 7, col 7). White pawns move
+towards row 0 (a right shift by 8), black pawns towards row 7 (a left shift by 8).
+"""
+
+FULL_BOARD = (1 << 64) - 1
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL_BOARD ^ FILE_A
+NOT_FILE_H = FULL_BOARD ^ FILE_H
+
+ROW_MASKS = [0xFF << (8 * row) for row in range(8)]
+
+# Rows a pawn lands on after the first step of a double push
+WHITE_DOUBLE_PUSH_ROW = ROW_MASKS[5]
+BLACK_DOUBLE_PUSH_ROW = ROW_MASKS[2]
+
+# Rows a pawn has to reach to win
+WHITE_GOAL_ROW = ROW_MASKS[0]
+BLACK_GOAL_ROW = ROW_MASKS[7]
+
+
+if hasattr(int, 'bit_count'):
+    def popcount(bb):
+        """Number of set bits in a bitboard"""
+        return bb.bit_count()
+else:  # Python < 3.10
+    def popcount(bb):
+        """Number of set bits in a bitboard"""
+        return bin(bb).count('1')
+
+
+def iter_squares(bb):
+    """Yield the square numbers of all set bits, lowest first"""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def double_pushes(pawns, empty, player):
+    """Destination squares of all two-square pushes from the starting row"""
+    if player == 'W':
+        return (((pawns >> 8) & empty & WHITE_DOUBLE_PUSH_ROW) >> 8) & empty
+    return (((pawns << 8) & empty & BLACK_DOUBLE_PUSH_ROW) << 8) & empty
+
+
+def left_attacks(pawns, player):
+    """Squares attacked towards column 0 (from = to + 9 for white, to - 7 for black)"""
+    if player == 'W':
+        return (pawns & NOT_FILE_A) >> 9
+    return ((pawns & NOT_FILE_A) << 7) & FULL_BOARD
+
+
+def right_attacks(pawns, player):
+    """Squares attacked towards column 7 (from = to + 7 for white, to - 9 for black)"""
+    if player == 'W':
+        return (pawns & NOT_FILE_H) >> 7
+    return ((pawns & NOT_FILE_H) << 9) & FULL_BOARD
+
+
+def en_passant_bit(ep_square, player):
+    """
+    Bitboard of the en passant square if `player` may capture onto it.
+
+    The square sits on row 5 after a white double push and on row 2 after a
+    black one, so only the opposite colour is allowed to take it.
+    """
+    if ep_square is None:
+        return 0
+    if player == 'W':
+        return (1 << ep_square) if ep_square >> 3 == 2 else 0
+    return (1 << ep_square) if ep_square >> 3 == 5 else 0
+
+
+def en_passant_capturable(pawns, ep_square, player):
+    """True if one of `player`'s pawns can actually capture onto the en passant square"""
+    ep_bit = en_passant_bit(ep_square, player)
+    return bool(ep_bit and (left_attacks(pawns, player) | right_attacks(pawns, player)) & ep_bit)
+
+
+def move_targets(pawns, enemies, ep_square, player):
+    """
+    Generate the moves of a whole side at once.
+
+    :return: Tuple (pushes, double_pushes, left_captures, right_captures) of
+             destination bitboards. Each target has exactly one origin, so
+             popcounts of these give the move count without building a list.
+    """
+    empty = FULL_BOARD ^ (pawns | enemies)
+    if player == 'W':
+        pushes = (pawns >> 8) & empty
+        doubles = ((pushes & WHITE_DOUBLE_PUSH_ROW) >> 8) & empty
+        targets = enemies | en_passant_bit(ep_square, player)
+        left = ((pawns & NOT_FILE_A) >> 9) & targets
+        right = ((pawns & NOT_FILE_H) >> 7) & targets
+    else:
+        pushes = (pawns << 8) & empty
+        doubles = ((pushes & BLACK_DOUBLE_PUSH_ROW) << 8) & empty
+        targets = enemies | en_passant_bit(ep_square, player)
+        left = ((pawns & NOT_FILE_A) << 7) & targets
+        right = ((pawns & NOT_FILE_H) << 9) & targets
+    return pushes, doubles, left, right
+
+
+def has_moves(pawns, enemies, ep_square, player):
+    """True if the side owning `pawns` has at least one legal move"""
+    pushes, _, left, right = move_targets(pawns, enemies, ep_square, player)
+    return bool(pushes or left or right)
+
+
+def _build_pawn_tables():
+    """
+    Per-colour, per-square destination masks, built once at import:
+    single push, double push (only from the starting row) and diagonal captures.
+    """
+    pushes = {'W': [0] * 64, 'B': [0] * 64}
+    doubles = {'W': [0] * 64, 'B': [0] * 64}
+    captures = {'W': [0] * 64, 'B': [0] * 64}
+    for player, direction, start_row in (('W', -1, 6), ('B', 1, 1)):
+        for sq in range(64):
+            row, col = sq >> 3, sq & 7
+            to_row = row + direction
+            if not 0 <= to_row < 8:
+                continue
+            pushes[player][sq] = 1 << (to_row * 8 + col)
+            if row == start_row:
+                doubles[player][sq] = 1 << ((to_row + direction) * 8 + col)
+            for to_col in (col - 1, col + 1):
+                if 0 <= to_col < 8:
+                    captures[player][sq] |= 1 << (to_row * 8 + to_col)
+    return pushes, doubles, captures
+
+
+PAWN_PUSHES, PAWN_DOUBLE_PUSHES, PAWN_CAPTURES = _build_pawn_tables()
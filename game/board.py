@@ -1,52 +1,290 @@
-import copy
+from game import rules
+from game.bitboard import popcount, iter_squares
+from game.moves import CAPTURE, EN_PASSANT
+from game.zobrist import ZOBRIST_PIECES, compute_key
+from game.state import Position
+
+# Starting position sent by the server and used by play_local.py
+STANDARD_SETUP = "Wa2 Wb2 Wc2 Wd2 We2 Wf2 Wg2 Wh2 Ba7 Bb7 Bc7 Bd7 Be7 Bf7 Bg7 Bh7"
+
+WHITE_KEYS = ZOBRIST_PIECES['W']
+BLACK_KEYS = ZOBRIST_PIECES['B']
+
+
+class _BoardRow:
+    """One row of the boardArray compatibility view"""
+    __slots__ = ('_board', '_row')
+
+    def __init__(self, board, row):
+        self._board = board
+        self._row = row
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[c] for c in range(8)[col]]
+        if col < 0:
+            col += 8
+        return self._board._piece_at(self._row * 8 + col)
+
+    def __setitem__(self, col, piece):
+        if col < 0:
+            col += 8
+        self._board._set_piece(self._row * 8 + col, piece)
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        for col in range(8):
+            yield self._board._piece_at(self._row * 8 + col)
+
+    def count(self, piece):
+        if piece == 'W':
+            return popcount(self._board.white & (0xFF << (8 * self._row)))
+        if piece == 'B':
+            return popcount(self._board.black & (0xFF << (8 * self._row)))
+        return list(self).count(piece)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _BoardArray:
+    """
+    List-of-lists view over the bitboards, so board.boardArray[row][col]
+    keeps working for reads and writes.
+    """
+    __slots__ = ('_board',)
+
+    def __init__(self, board):
+        self._board = board
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [_BoardRow(self._board, r) for r in range(8)[row]]
+        if row < 0:
+            row += 8
+        if not 0 <= row < 8:
+            raise IndexError("board row out of range")
+        return _BoardRow(self._board, row)
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        for row in range(8):
+            yield _BoardRow(self._board, row)
+
+    def __eq__(self, other):
+        return [list(row) for row in self] == [list(row) for row in other]
+
+    def __repr__(self):
+        return repr([list(row) for row in self])
+
 
 class ChessBoard:
     def __init__(self):
-        self.boardArray = [[' ' for _ in range(8)] for _ in range(8)]
-        self.initialize_pawns()
+        # One 64-bit int per colour, bit (row * 8 + col) set where a pawn stands
+        self.white = 0
+        self.black = 0
+
+        # Last move played, as an int move (see game.moves)
         self.last_move = None
-        self.last_move_was_two_square = False
-        
+
         # This square marks the potential en passant capture location.
         # For example, if White moves a pawn from (6, col) to (4, col),
-        # we set en_passant_target = (5, col). That is where an opposing
+        # we set the en passant square to (5, col). That is where an opposing
         # pawn could capture en passant on the very next move.
-        self.en_passant_target = None
-        
+        # Stored as a square number; see the en_passant_target property.
+        self.ep_square = None
+
+        # Whose turn it is; flipped by every move
+        self.side_to_move = 'W'
+
+        # 64-bit Zobrist key of (pawns, side to move, en passant file),
+        # updated incrementally by make_move/unmake_move
+        self.zobrist_key = 0
+
+        # Pawns left per colour, updated on every capture and setup change.
+        # The bitboards themselves are the per-colour piece sets.
+        self.pawn_counts = {'W': 0, 'B': 0}
+
+        # terminal_status() result and the Zobrist key it was computed for
+        self._status_key = None
+        self._status = None
+        self.initialize_pawns()
+
         # Move history for potential undo functionality
         self.move_history = []
 
+    # -------------- Compatibility views --------------
+
+    @property
+    def boardArray(self):
+        """8x8 'W'/'B'/' ' view of the position (reads and writes go to the bitboards)"""
+        return _BoardArray(self)
+
+    @boardArray.setter
+    def boardArray(self, rows):
+        self.white = 0
+        self.black = 0
+        for r, row in enumerate(rows):
+            for c, piece in enumerate(row):
+                if piece == 'W':
+                    self.white |= 1 << (r * 8 + c)
+                elif piece == 'B':
+                    self.black |= 1 << (r * 8 + c)
+        self._recount()
+        self._rehash()
+
+    @property
+    def en_passant_target(self):
+        """En passant square as (row, col), or None"""
+        if self.ep_square is None:
+            return None
+        return (self.ep_square >> 3, self.ep_square & 7)
+
+    @en_passant_target.setter
+    def en_passant_target(self, target):
+        self.ep_square = None if target is None else target[0] * 8 + target[1]
+        self._rehash()
+
+    @property
+    def last_move_was_two_square(self):
+        """True if the last move was a two-square advance (it left an en passant square)"""
+        return self.ep_square is not None
+
+    def _piece_at(self, sq):
+        bit = 1 << sq
+        if self.white & bit:
+            return 'W'
+        if self.black & bit:
+            return 'B'
+        return ' '
+
+    def _set_piece(self, sq, piece):
+        bit = 1 << sq
+        if self.white & bit:
+            self.white ^= bit
+            self.zobrist_key ^= WHITE_KEYS[sq]
+            self.pawn_counts['W'] -= 1
+        elif self.black & bit:
+            self.black ^= bit
+            self.zobrist_key ^= BLACK_KEYS[sq]
+            self.pawn_counts['B'] -= 1
+        if piece == 'W':
+            self.white |= bit
+            self.zobrist_key ^= WHITE_KEYS[sq]
+            self.pawn_counts['W'] += 1
+        elif piece == 'B':
+            self.black |= bit
+            self.zobrist_key ^= BLACK_KEYS[sq]
+            self.pawn_counts['B'] += 1
+        if self.ep_square is not None:
+            # Whether the en passant file is hashed depends on the pawns around it
+            self._rehash()
+
+    def _recount(self):
+        self.pawn_counts = {'W': popcount(self.white), 'B': popcount(self.black)}
+
+    def _rehash(self):
+        self.zobrist_key = compute_key(self.white, self.black, self.side_to_move, self.ep_square)
+
+    def set_side_to_move(self, player):
+        """Declare whose turn it is (e.g. after loading a position from text)"""
+        if player != self.side_to_move:
+            self.side_to_move = player
+            self._rehash()
+
+    def _pieces(self, player):
+        return self.white if player == 'W' else self.black
+
+    # -------------- Setup --------------
+
     def initialize_pawns(self):
         """Initialize the board with pawns: White on row 6, Black on row 1."""
-        # Place white pawns on row 6
-        for col in range(8):
-            self.boardArray[6][col] = 'W'
-        # Place black pawns on row 1
-        for col in range(8):
-            self.boardArray[1][col] = 'B'
+        self.white = 0xFF << 48
+        self.black = 0xFF << 8
+        self._recount()
+        self._rehash()
 
     def clear_board(self):
         """Clear the board for new setup"""
-        self.boardArray = [[' ' for _ in range(8)] for _ in range(8)]
+        self.white = 0
+        self.black = 0
         self.last_move = None
-        self.last_move_was_two_square = False
-        self.en_passant_target = None
+        self.ep_square = None
+        self.side_to_move = 'W'
+        self.zobrist_key = 0
+        self.pawn_counts = {'W': 0, 'B': 0}
+        self._status_key = None
+        self._status = None
         self.move_history = []
 
+    def load_setup(self, setup):
+        """
+        Clear the board and place pawns from a setup string such as
+        "Setup Wa2 Wb2 ... Bh7" (the leading "Setup" word is optional).
+        """
+        self.clear_board()
+        for part in setup.split():
+            if len(part) != 3 or part[0] not in ('W', 'B'):
+                continue
+            col = ord(part[1].lower()) - ord('a')
+            row = 8 - int(part[2])
+            if 0 <= row < 8 and 0 <= col < 8:
+                self._set_piece(row * 8 + col, part[0])
+
     def copy(self):
         """
-        Create a deep copy of the board
-        
+        Create a copy of the board
+
         :return: A new ChessBoard instance with the same state
         """
-        new_board = ChessBoard()
-        new_board.boardArray = copy.deepcopy(self.boardArray)
-        new_board.last_move = copy.deepcopy(self.last_move)
-        new_board.last_move_was_two_square = self.last_move_was_two_square
-        new_board.en_passant_target = copy.deepcopy(self.en_passant_target)
-        new_board.move_history = copy.deepcopy(self.move_history)
+        new_board = ChessBoard.__new__(ChessBoard)
+        new_board.white = self.white
+        new_board.black = self.black
+        new_board.last_move = self.last_move
+        new_board.ep_square = self.ep_square
+        new_board.side_to_move = self.side_to_move
+        new_board.zobrist_key = self.zobrist_key
+        new_board.pawn_counts = dict(self.pawn_counts)
+        new_board._status_key = self._status_key
+        new_board._status = self._status
+        new_board.move_history = list(self.move_history)
         return new_board
 
+    # -------------- Positions --------------
+
+    def to_position(self):
+        """Immutable snapshot of the current position (no history)"""
+        return Position.from_board(self)
+
+    def load_position(self, position):
+        """Set the board to `position`, clearing history and last move"""
+        self.white, self.black, self.side_to_move, self.ep_square, self.zobrist_key = position
+        self.last_move = None
+        self.move_history = []
+        self._status_key = None
+        self._status = None
+        self._recount()
+
+    @classmethod
+    def from_position(cls, position):
+        """New board set to `position`"""
+        board = cls.__new__(cls)
+        board.load_position(position)
+        return board
+
+    def __reduce__(self):
+        # Pickle as a Position so worker processes don't receive the move history
+        return (_board_from_position, (self.to_position(), self.last_move))
+
+    # -------------- Move generation --------------
+
     def get_valid_moves(self, row, col):
         """
         Return all valid (to_row, to_col) moves for a pawn located at (row, col).
@@ -54,135 +292,132 @@ class ChessBoard:
             - Single-square forward moves (if empty)
             - Two-square forward (if on initial rank and both squares are empty)
             - Normal diagonal captures
-            - En passant captures (if self.en_passant_target is set and applicable)
+            - En passant captures (if the en passant square belongs to the opponent's last push)
         """
-        moves = []
-        player = self.boardArray[row][col]
-        
-        if player not in ('W', 'B'):
-            return moves  # No pawn here
+        return rules.pawn_moves(self.white, self.black, self.ep_square, row * 8 + col)
 
-        # White moves "up" (row decreases), black moves "down" (row increases)
-        direction = -1 if player == 'W' else 1
-        
-        def on_board(r, c):
-            return 0 <= r < 8 and 0 <= c < 8
-
-        # 1) Single-square forward
-        one_step_row = row + direction
-        if on_board(one_step_row, col) and self.boardArray[one_step_row][col] == ' ':
-            moves.append((one_step_row, col))
-
-            # 2) Two-square forward (if on initial rank and path is clear)
-            # White pawns start on row 6, black pawns start on row 1
-            if (player == 'W' and row == 6) or (player == 'B' and row == 1):
-                two_step_row = row + 2 * direction
-                if on_board(two_step_row, col) and self.boardArray[two_step_row][col] == ' ':
-                    moves.append((two_step_row, col))
-
-        # 3) Normal diagonal captures
-        for dc in (-1, 1):  # left diagonal, right diagonal
-            diag_row = row + direction
-            diag_col = col + dc
-            if on_board(diag_row, diag_col):
-                target_piece = self.boardArray[diag_row][diag_col]
-                # White can capture black, black can capture white
-                if (player == 'W' and target_piece == 'B') or (player == 'B' and target_piece == 'W'):
-                    moves.append((diag_row, diag_col))
-
-        # 4) En passant capture:
-        #    If self.en_passant_target = (r, c), and (r, c) is exactly one diagonal
-        #    forward from (row, col), that is a valid en passant capture square.
-        if self.en_passant_target:
-            en_r, en_c = self.en_passant_target
-            # Pawn must move to row+direction, col±1 to match (en_r, en_c).
-            if on_board(en_r, en_c):
-                if en_r == row + direction and abs(en_c - col) == 1:
-                    # The diagonal squares line up, so it's a valid en passant move
-                    moves.append((en_r, en_c))
+    def generate_moves(self, player):
+        """
+        All moves of `player` as int moves (see game.moves), captures first.
+        """
+        return rules.generate_moves(self.white, self.black, self.ep_square, player)
 
-        return moves
+    def generate_tactical_moves(self, player):
+        """Captures and pushes onto the last two rows, as int moves (for quiescence search)"""
+        return rules.generate_tactical_moves(self.white, self.black, self.ep_square, player)
+
+    def count_moves(self, player):
+        """Number of moves `player` has, computed without building a list"""
+        return rules.count_moves(self.white, self.black, self.ep_square, player)
+
+    def progress(self):
+        """Irreversible progress of the position (see game.rules.progress)"""
+        return rules.progress(self.white, self.black)
+
+    # -------------- Making moves --------------
+
+    def encode_move(self, move):
+        """
+        Int move with the flags it has in this position.
+
+        :param move: Int move (flags are recomputed), or a
+                     (from_row, from_col, to_row, to_col) tuple/list
+        """
+        if isinstance(move, int):
+            from_sq = move & 63
+            to_sq = (move >> 6) & 63
+        else:
+            from_row, from_col, to_row, to_col = move
+            from_sq = from_row * 8 + from_col
+            to_sq = to_row * 8 + to_col
+        return rules.encode_move(self.white, self.black, self.ep_square, from_sq, to_sq)
+
+    def make_move(self, move, player):
+        """
+        Play a move in place. No legality or win checks are done here, so this
+        is the one to use inside the search; pair every call with unmake_move.
+        `player` must be the side to move.
+
+        :param move: Int move with its flags set (from generate_moves or
+                     encode_move), assumed legal
+        :param player: Player color ('W' or 'B')
+        :return: Undo record (move, previous en passant square, previous
+                 last_move, previous Zobrist key)
+        """
+        prev_ep = self.ep_square
+        prev_key = self.zobrist_key
+        self.white, self.black, self.side_to_move, self.ep_square, self.zobrist_key = rules.play(
+            self.white, self.black, player, prev_ep, prev_key, move)
+        if move & CAPTURE:
+            self.pawn_counts[self.side_to_move] -= 1
+
+        undo = (move, prev_ep, self.last_move, prev_key)
+        self.last_move = move
+        return undo
+
+    def unmake_move(self, undo):
+        """Take back a move played with make_move, using its undo record"""
+        move, prev_ep, prev_last_move, prev_key = undo
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        move_bits = (1 << from_sq) | (1 << to_sq)
+        if self.white >> to_sq & 1:
+            self.white ^= move_bits
+            if move & CAPTURE:
+                self.black |= 1 << (to_sq + 8 if move & EN_PASSANT else to_sq)
+                self.pawn_counts['B'] += 1
+            self.side_to_move = 'W'
+        else:
+            self.black ^= move_bits
+            if move & CAPTURE:
+                self.white |= 1 << (to_sq - 8 if move & EN_PASSANT else to_sq)
+                self.pawn_counts['W'] += 1
+            self.side_to_move = 'B'
+        self.ep_square = prev_ep
+        self.last_move = prev_last_move
+        self.zobrist_key = prev_key
 
     def computeMove(self, move, player):
         """
         Execute a move on the board with comprehensive En Passant handling
-        
-        :param move: Tuple (from_row, from_col, to_row, to_col)
+
+        :param move: Int move, or tuple/list (from_row, from_col, to_row, to_col)
         :param player: Player color ('W' or 'B')
-        :return: True if the move was executed successfully and the game is not over, 
+        :return: True if the move was executed successfully and the game is not over,
                 False if illegal, or 'win' if the move resulted in a win.
         """
-        from_row, from_col, to_row, to_col = move
-        
-        # Save the previous state for potential undo
-        previous_state = {
-            'board': copy.deepcopy(self.boardArray),
-            'last_move': self.last_move,
-            'last_move_was_two_square': self.last_move_was_two_square,
-            'en_passant_target': self.en_passant_target
-        }
-        self.move_history.append(previous_state)
-        
-        # Verify the piece belongs to the player
-        if self.boardArray[from_row][from_col] != player:
+        move = self.encode_move(move)
+
+        # Moves come from the network and external engines: anything that is
+        # not one of the player's legal moves (which also covers a missing or
+        # foreign pawn on the from square) is refused before it touches the board
+        if move not in self.generate_moves(player):
             return False
-        
-        self.last_move = move
-        piece = self.boardArray[from_row][from_col]
-        
-        # Check if this is a two-square pawn move
-        self.last_move_was_two_square = (abs(from_row - to_row) == 2)
-        
-        # Determine movement direction
-        direction = -1 if player == 'W' else 1
 
-        if self.last_move_was_two_square:
-            # If the pawn just moved two squares, set en_passant_target
-            # to the middle square behind the pawn.
-            mid_row = (from_row + to_row) // 2
-            self.en_passant_target = (mid_row, from_col)
-        else:
-            # Possibly an en passant capture
-            is_en_passant = False
-            if self.en_passant_target:
-                en_r, en_c = self.en_passant_target
-                is_en_passant = (
-                    (to_row, to_col) == (en_r, en_c)
-                    and abs(to_col - from_col) == 1
-                    and to_row == from_row + direction
-                )
-            
-            if is_en_passant:
-                # Remove the captured pawn
-                self.boardArray[from_row][to_col] = ' '
-            
-            # Reset en_passant_target if move was NOT a two-square advance
-            self.en_passant_target = None
-
-        # Place the moving piece on the new square
-        self.boardArray[to_row][to_col] = piece
-        # Vacate the old square
-        self.boardArray[from_row][from_col] = ' '
-        
+        # Moves arrive in turn order from the game loop, but a board loaded
+        # from text may not know yet whose turn it is
+        if self.side_to_move != player:
+            self.set_side_to_move(player)
+
+        # Keep the compact undo record for undo_move
+        self.move_history.append(self.make_move(move, player))
+
         # Check if the move resulted in a win
         if self.check_win(player):
             return 'win'  # Indicate that the game is over and the player has won
-        
+
         return True
 
     def undo_move(self):
         """Undo the last move if possible"""
         if not self.move_history:
             return False
-            
-        previous_state = self.move_history.pop()
-        self.boardArray = previous_state['board']
-        self.last_move = previous_state['last_move']
-        self.last_move_was_two_square = previous_state['last_move_was_two_square']
-        self.en_passant_target = previous_state['en_passant_target']
-        
+
+        self.unmake_move(self.move_history.pop())
         return True
 
+    # -------------- Game status --------------
+
     def check_win(self, player):
         """
         Check if the given player has won the game.
@@ -190,78 +425,56 @@ class ChessBoard:
         1. Reach the opposite side of the board (row 0 for White, row 7 for Black)
         2. Capture all opponent pieces
         3. Opponent has no legal moves
-        
+
         :param player: Player color ('W' or 'B')
         :return: True if the player has won, False otherwise
         """
-        opponent = 'B' if player == 'W' else 'W'
-        
-        # Win condition 1: Reach the opposite end
-        target_row = 0 if player == 'W' else 7
-        for col in range(8):
-            if self.boardArray[target_row][col] == player:
-                return True
-                
-        # Win condition 2: Capture all opponent pieces
-        opponent_count = 0
-        for row in range(8):
-            for col in range(8):
-                if self.boardArray[row][col] == opponent:
-                    opponent_count += 1
-        
-        if opponent_count == 0:
-            return True
-            
-        # Win condition 3: Opponent has no legal moves
-        opponent_has_moves = False
-        for row in range(8):
-            for col in range(8):
-                if self.boardArray[row][col] == opponent:
-                    if self.get_valid_moves(row, col):
-                        opponent_has_moves = True
-                        break
-            if opponent_has_moves:
-                break
-                
-        if not opponent_has_moves and opponent_count > 0:
-            return True
-            
-        return False
-   
+        return rules.is_win(self.white, self.black, self.ep_square, player)
+
+    def terminal_status(self):
+        """
+        Decide the game in one pass over the win conditions (see game.rules.winner).
+        The result is cached until the position changes.
+
+        :return: 'W' or 'B' for the winner, None if the game is not over
+        """
+        key = self.zobrist_key
+        if key == self._status_key:
+            return self._status
+        status = rules.winner(self.white, self.black, self.side_to_move, self.ep_square)
+        self._status_key = key
+        self._status = status
+        return status
+
     def describe_en_passant_moves(self, row, col):
         """
         Describe possible En Passant moves for a specific pawn.
         """
         moves = []
-        player = self.boardArray[row][col]
-        
+        player = self._piece_at(row * 8 + col)
+
         if player not in ('W', 'B'):
             return moves
-            
-        if not self.en_passant_target:
+
+        if self.ep_square is None:
             return moves
-            
+
         en_r, en_c = self.en_passant_target
         direction = -1 if player == 'W' else 1
-        
+
         # Check if this pawn can perform an en passant capture
         if en_r == row + direction and abs(en_c - col) == 1:
             moves.append((row, col, en_r, en_c))
-            
+
         return moves
 
     def count_pawns(self, player):
         """Count the number of pawns for a given player"""
-        return sum(row.count(player) for row in self.boardArray)
+        return self.pawn_counts[player]
 
     def get_pawn_positions(self, player):
         """Get positions of all pawns for a given player"""
-        positions = []
-        for r in range(8):
-            for c in range(8):
-                if self.boardArray[r][c] == player:
-                    positions.append((r, c))
-        return positions
+        return [(sq >> 3, sq & 7) for sq in iter_squares(self._pieces(player))]
 
     def print_board(self):
         """
@@ -270,4 +483,10 @@ class ChessBoard:
         print("  a b c d e f g h")
         for i, row in enumerate(self.boardArray):
             print(f"{8-i} {' '.join(cell if cell != ' ' else '.' for cell in row)} {8-i}")
-        print("  a b c d e f g h")
\ No newline at end of file
+        print("  a b c d e f g h")
+
+
+def _board_from_position(position, last_move=None):
+    board = ChessBoard.from_position(position)
+    board.last_move = last_move
+    return board
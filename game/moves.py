@@ -0,0 +1,91 @@
+"""
+Compact integer move encoding.
+
+A move is a plain int:
+
+    bits 0-5    from square (row * 8 + col, as in game.bitboard)
+    bits 6-11   to square
+    bits 12-14  flags (CAPTURE, DOUBLE_PUSH, EN_PASSANT)
+
+Ints are what the move generator, the search and its ordering tables work
+with; tuples and algebraic strings are only built at the edges (UI, network
+protocol, logging) through the tables below.
+"""
+
+CAPTURE = 1 << 12
+DOUBLE_PUSH = 1 << 13
+EN_PASSANT = 1 << 14
+
+SQUARE_MASK = 0x3F
+
+# 'a8' for square 0 ... 'h1' for square 63
+SQUARE_NAMES = [chr(ord('a') + (sq & 7)) + str(8 - (sq >> 3)) for sq in range(64)]
+SQUARE_FROM_NAME = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+
+def encode(from_sq, to_sq, flags=0):
+    """Pack a move into an int"""
+    return from_sq | (to_sq << 6) | flags
+
+
+def move_to_str(move):
+    """Algebraic text of a move, e.g. 'a2a4'"""
+    return SQUARE_NAMES[move & SQUARE_MASK] + SQUARE_NAMES[(move >> 6) & SQUARE_MASK]
+
+
+def move_from_str(text):
+    """
+    Base move (squares only, no flags) from algebraic text such as 'a2a4'.
+    Use ChessBoard.encode_move to add the flags for a given position.
+
+    :return: The move, or None if the text is not two square names
+    """
+    from_sq = SQUARE_FROM_NAME.get(text[0:2].lower())
+    to_sq = SQUARE_FROM_NAME.get(text[2:4].lower())
+    if from_sq is None or to_sq is None:
+        return None
+    return from_sq | (to_sq << 6)
+
+
+def move_to_coords(move):
+    """(from_row, from_col, to_row, to_col) of a move"""
+    from_sq = move & SQUARE_MASK
+    to_sq = (move >> 6) & SQUARE_MASK
+    return from_sq >> 3, from_sq & 7, to_sq >> 3, to_sq & 7
+
+
+def _build_move_tables():
+    """
+    Per-colour moves indexed by destination square, so the generator can turn
+    each bit of a whole-side target mask into a move with one lookup:
+    single push, double push, capture from the left-hand and from the
+    right-hand pawn (the same split as game.bitboard.move_targets).
+    Entries with no possible origin are 0.
+    """
+    pushes = {'W': [0] * 64, 'B': [0] * 64}
+    doubles = {'W': [0] * 64, 'B': [0] * 64}
+    left = {'W': [0] * 64, 'B': [0] * 64}
+    right = {'W': [0] * 64, 'B': [0] * 64}
+    for to_sq in range(64):
+        row, col = to_sq >> 3, to_sq & 7
+        # White moves towards row 0, so its origins are below the target
+        if row < 7:
+            pushes['W'][to_sq] = encode(to_sq + 8, to_sq)
+            if col < 7:
+                left['W'][to_sq] = encode(to_sq + 9, to_sq, CAPTURE)
+            if col > 0:
+                right['W'][to_sq] = encode(to_sq + 7, to_sq, CAPTURE)
+        if row == 4:
+            doubles['W'][to_sq] = encode(to_sq + 16, to_sq, DOUBLE_PUSH)
+        if row > 0:
+            pushes['B'][to_sq] = encode(to_sq - 8, to_sq)
+            if col < 7:
+                left['B'][to_sq] = encode(to_sq - 7, to_sq, CAPTURE)
+            if col > 0:
+                right['B'][to_sq] = encode(to_sq - 9, to_sq, CAPTURE)
+        if row == 3:
+            doubles['B'][to_sq] = encode(to_sq - 16, to_sq, DOUBLE_PUSH)
+    return pushes, doubles, left, right
+
+
+PUSH_MOVES, DOUBLE_PUSH_MOVES, LEFT_CAPTURE_MOVES, RIGHT_CAPTURE_MOVES = _build_move_tables()
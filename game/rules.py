@@ -1,3 +1,262 @@
+"""
+The rules of Two Flags in one place.
+
+The module-level functions work directly on the colour bitboards and are what
+ChessBoard, Position, Rules and the game scripts all call, so every rules fix
+or speed-up lands here once.
+"""
+
+from game.bitboard import (
+    FULL_BOARD, ROW_MASKS, WHITE_GOAL_ROW, BLACK_GOAL_ROW,
+    PAWN_PUSHES, PAWN_DOUBLE_PUSHES, PAWN_CAPTURES,
+    popcount, en_passant_bit, en_passant_capturable, move_targets, has_moves,
+)
+from game.moves import (
+    CAPTURE, DOUBLE_PUSH, EN_PASSANT,
+    PUSH_MOVES, DOUBLE_PUSH_MOVES, LEFT_CAPTURE_MOVES, RIGHT_CAPTURE_MOVES,
+)
+from game.zobrist import ZOBRIST_PIECES, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_EP_FILE
+
+_WHITE_KEYS = ZOBRIST_PIECES['W']
+_BLACK_KEYS = ZOBRIST_PIECES['B']
+
+# Rows whose number has bit 0, 1 or 2 set: popcounts of a bitboard on them,
+# weighted 1, 2 and 4, add up to the row numbers of all its pawns
+_ROW_BIT_MASKS = [sum(ROW_MASKS[row] for row in range(8) if row >> bit & 1) for bit in range(3)]
+
+
+def pawn_moves(white, black, ep_square, sq):
+    """
+    Destinations of the pawn on square `sq` as (to_row, to_col) tuples:
+    pushes first, then captures (including en passant) left to right.
+    """
+    bit = 1 << sq
+    if white & bit:
+        player, enemies = 'W', black
+    elif black & bit:
+        player, enemies = 'B', white
+    else:
+        return []  # No pawn here
+
+    empty = FULL_BOARD ^ (white | black)
+    moves = []
+
+    push = PAWN_PUSHES[player][sq] & empty
+    if push:
+        to_sq = push.bit_length() - 1
+        moves.append((to_sq >> 3, to_sq & 7))
+        double = PAWN_DOUBLE_PUSHES[player][sq] & empty
+        if double:
+            to_sq = double.bit_length() - 1
+            moves.append((to_sq >> 3, to_sq & 7))
+
+    captures = PAWN_CAPTURES[player][sq] & (enemies | en_passant_bit(ep_square, player))
+    while captures:
+        lsb = captures & -captures
+        to_sq = lsb.bit_length() - 1
+        moves.append((to_sq >> 3, to_sq & 7))
+        captures ^= lsb
+    return moves
+
+
+def generate_moves(white, black, ep_square, player):
+    """
+    All moves of `player` as int moves (see game.moves), built from the
+    whole-side target masks with one table lookup per move.
+    Captures come first, then single and double pushes.
+    """
+    if player == 'W':
+        pushes, doubles, left, right = move_targets(white, black, ep_square, 'W')
+    else:
+        pushes, doubles, left, right = move_targets(black, white, ep_square, 'B')
+    ep_bit = en_passant_bit(ep_square, player)
+
+    out = []
+    append = out.append
+    for targets, table in ((left, LEFT_CAPTURE_MOVES[player]), (right, RIGHT_CAPTURE_MOVES[player]),
+                           (pushes, PUSH_MOVES[player]), (doubles, DOUBLE_PUSH_MOVES[player])):
+        while targets:
+            lsb = targets & -targets
+            targets ^= lsb
+            move = table[lsb.bit_length() - 1]
+            if lsb == ep_bit and move & CAPTURE:
+                move |= EN_PASSANT
+            append(move)
+    return out
+
+
+def generate_tactical_moves(white, black, ep_square, player):
+    """
+    The moves quiescence search extends: captures (including en passant) and
+    pushes onto the last two rows before the goal, as int moves.
+    """
+    if player == 'W':
+        pushes, doubles, left, right = move_targets(white, black, ep_square, 'W')
+        pushes &= WHITE_GOAL_ROW | ROW_MASKS[1]
+    else:
+        pushes, doubles, left, right = move_targets(black, white, ep_square, 'B')
+        pushes &= BLACK_GOAL_ROW | ROW_MASKS[6]
+    ep_bit = en_passant_bit(ep_square, player)
+
+    out = []
+    append = out.append
+    for targets, table in ((left, LEFT_CAPTURE_MOVES[player]), (right, RIGHT_CAPTURE_MOVES[player]),
+                           (pushes, PUSH_MOVES[player])):
+        while targets:
+            lsb = targets & -targets
+            targets ^= lsb
+            move = table[lsb.bit_length() - 1]
+            if lsb == ep_bit and move & CAPTURE:
+                move |= EN_PASSANT
+            append(move)
+    return out
+
+
+def encode_move(white, black, ep_square, from_sq, to_sq):
+    """
+    Int move from `from_sq` to `to_sq` with the flags it has in this position.
+    Only the squares are used, so it also turns (row, col) input or algebraic
+    text into the form make_move expects; legality is not checked.
+    """
+    move = from_sq | (to_sq << 6)
+    if (from_sq ^ to_sq) & 7:
+        move |= CAPTURE
+        if not (white | black) >> to_sq & 1 and to_sq == ep_square:
+            move |= EN_PASSANT
+    elif from_sq - to_sq == 16 or to_sq - from_sq == 16:
+        move |= DOUBLE_PUSH
+    return move
+
+
+def count_moves(white, black, ep_square, player):
+    """Number of moves `player` has, from whole-side masks without building a list"""
+    if player == 'W':
+        pushes, doubles, left, right = move_targets(white, black, ep_square, 'W')
+    else:
+        pushes, doubles, left, right = move_targets(black, white, ep_square, 'B')
+    return popcount(pushes) + popcount(doubles) + popcount(left) + popcount(right)
+
+
+def is_win(white, black, ep_square, player):
+    """
+    Check if `player` has won.
+    Win conditions:
+    1. Reach the opposite side of the board (row 0 for White, row 7 for Black)
+    2. Capture all opponent pieces
+    3. Opponent has no legal moves
+    """
+    if player == 'W':
+        own, opponent_pieces, goal, opponent = white, black, WHITE_GOAL_ROW, 'B'
+    else:
+        own, opponent_pieces, goal, opponent = black, white, BLACK_GOAL_ROW, 'W'
+
+    # Win condition 1: Reach the opposite end
+    if own & goal:
+        return True
+
+    # Win condition 2: Capture all opponent pieces
+    if not opponent_pieces:
+        return True
+
+    # Win condition 3: Opponent has no legal moves
+    return not has_moves(opponent_pieces, own, ep_square, opponent)
+
+
+def winner(white, black, side_to_move, ep_square):
+    """
+    Decide the game in one pass over the win conditions.
+
+    The side that just moved wins if it reached its goal row, captured every
+    opposing pawn or left the side to move without a legal move. Otherwise the
+    side to move wins if it already stands on its goal row or has nothing
+    left to capture.
+
+    :return: 'W' or 'B' for the winner, None if the game is not over
+    """
+    if side_to_move == 'W':
+        if black & BLACK_GOAL_ROW or not white or not has_moves(white, black, ep_square, 'W'):
+            return 'B'
+        if white & WHITE_GOAL_ROW or not black:
+            return 'W'
+    else:
+        if white & WHITE_GOAL_ROW or not black or not has_moves(black, white, ep_square, 'B'):
+            return 'W'
+        if black & BLACK_GOAL_ROW or not white:
+            return 'B'
+    return None
+
+
+def _row_sum(pawns):
+    """Sum of the row numbers of all pawns in a bitboard"""
+    ones, twos, fours = _ROW_BIT_MASKS
+    return popcount(pawns & ones) + 2 * popcount(pawns & twos) + 4 * popcount(pawns & fours)
+
+
+def progress(white, black):
+    """
+    Irreversible progress of a position. Pawns never move back and never
+    come back once captured, so every move raises this number: a push by 1
+    or 2, a capture by at least 2 (8 for the lost pawn, minus at most 7 for
+    its advancement, plus 1 for the capturing pawn's step). A position can
+    therefore only reach positions with a higher progress.
+
+    :return: 8 * pawns captured (out of 32) + advancement of both sides in rows
+    """
+    white_count = popcount(white)
+    black_count = popcount(black)
+    white_advance = 7 * white_count - _row_sum(white)
+    black_advance = _row_sum(black)
+    return 8 * (32 - white_count - black_count) + white_advance + black_advance
+
+
+def play(white, black, side_to_move, ep_square, key, move):
+    """
+    The position after `move` by `side_to_move` (no legality check), with
+    its Zobrist key updated incrementally. This is where every move is
+    applied: Position.play, ChessBoard.make_move and the code that walks the
+    game tree on bare bitboards all go through it.
+
+    :param key: Zobrist key of the position (any value, e.g. 0, if the caller doesn't use keys)
+    :return: (white, black, side to move, en passant square, key), the fields of a game.state.Position
+    """
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+
+    # The en passant file is only part of the key while it can be taken
+    if ep_square is not None and en_passant_capturable(white if side_to_move == 'W' else black,
+                                                       ep_square, side_to_move):
+        key ^= ZOBRIST_EP_FILE[ep_square & 7]
+
+    if side_to_move == 'W':
+        if move & CAPTURE:
+            # En passant: the captured pawn sits behind the destination square
+            captured_sq = to_sq + 8 if move & EN_PASSANT else to_sq
+            black ^= 1 << captured_sq
+            key ^= _BLACK_KEYS[captured_sq]
+        white ^= (1 << from_sq) | (1 << to_sq)
+        key ^= _WHITE_KEYS[from_sq] ^ _WHITE_KEYS[to_sq] ^ ZOBRIST_BLACK_TO_MOVE
+        side_to_move = 'B'
+        pawns = black
+    else:
+        if move & CAPTURE:
+            captured_sq = to_sq - 8 if move & EN_PASSANT else to_sq
+            white ^= 1 << captured_sq
+            key ^= _WHITE_KEYS[captured_sq]
+        black ^= (1 << from_sq) | (1 << to_sq)
+        key ^= _BLACK_KEYS[from_sq] ^ _BLACK_KEYS[to_sq] ^ ZOBRIST_BLACK_TO_MOVE
+        side_to_move = 'W'
+        pawns = white
+
+    # After a two-square advance the square jumped over can be taken en passant
+    if move & DOUBLE_PUSH:
+        ep_square = (from_sq + to_sq) >> 1
+        if en_passant_capturable(pawns, ep_square, side_to_move):
+            key ^= ZOBRIST_EP_FILE[from_sq & 7]
+    else:
+        ep_square = None
+    return white, black, side_to_move, ep_square, key
+
+
 class Rules:
     @staticmethod
     def get_valid_moves(board, row, col):
@@ -13,64 +272,7 @@ class Rules:
         if (row < 0 or row >= 8 or col < 0 or col >= 8):
             return []
 
-        piece = board.boardArray[row][col]
-        if piece not in ['W', 'B']:
-            return []
-
-        moves = []
-        
-        # Determine movement parameters based on color
-        if piece == 'W':
-            direction = -1  # White moves up (negative row)
-            start_rank = 6
-            en_passant_rank = 3
-            opponent = 'B'
-        else:  # Black
-            direction = 1   # Black moves down (positive row)
-            start_rank = 1
-            en_passant_rank = 4
-            opponent = 'W'
-        
-        # Forward moves
-        new_row = row + direction
-        
-        # Forward one square
-        if 0 <= new_row < 8 and board.boardArray[new_row][col] == ' ':
-            moves.append((new_row, col))
-            
-            # Initial two-square move
-            if row == start_rank:
-                two_square_row = row + 2 * direction
-                if board.boardArray[two_square_row][col] == ' ' and \
-                   board.boardArray[row + direction][col] == ' ':
-                    moves.append((two_square_row, col))
-        
-        # Diagonal captures (including En Passant targets)
-        diagonal_captures = [
-            (row + direction, col - 1),  # Left diagonal
-            (row + direction, col + 1)   # Right diagonal
-        ]
-        
-        for new_row, new_col in diagonal_captures:
-            # Check bounds
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                # Regular capture of opponent's pawn
-                target = board.boardArray[new_row][new_col]
-                
-                # Capture conditions
-                capture_conditions = (
-                    # Capture an opponent's pawn
-                    (target != ' ' and target != piece) or
-                    # En Passant capture
-                    (board.en_passant_target and 
-                     new_col == board.en_passant_target[1] and 
-                     row == en_passant_rank)
-                )
-                
-                if capture_conditions:
-                    moves.append((new_row, new_col))
-        
-        return moves
+        return pawn_moves(board.white, board.black, board.ep_square, row * 8 + col)
 
     @staticmethod
     def is_valid_move(board, from_pos, to_pos, player):
@@ -87,14 +289,12 @@ class Rules:
         to_row, to_col = to_pos
 
         # Validate the piece belongs to the player
-        if board.boardArray[from_row][from_col] != player:
+        own = board.white if player == 'W' else board.black
+        if not (own >> (from_row * 8 + from_col)) & 1:
             return False
 
-        # Get all valid moves for this pawn
-        valid_moves = Rules.get_valid_moves(board, from_row, from_col)
-        
         # Check if the proposed move is in the list of valid moves
-        return (to_row, to_col) in valid_moves
+        return (to_row, to_col) in Rules.get_valid_moves(board, from_row, from_col)
 
     @staticmethod
     def is_win(board, player):
@@ -105,33 +305,7 @@ class Rules:
         :param player: Player color ('W' or 'B')
         :return: Boolean indicating if the player has won
         """
-        opponent = 'B' if player == 'W' else 'W'
-        
-        # Win condition 1: Reach the opposite end
-        target_row = 0 if player == 'W' else 7
-        for col in range(8):
-            if board.boardArray[target_row][col] == player:
-                return True
-
-        # Win condition 2: Capture all opponent's pawns
-        opponent_pawns = sum(row.count(opponent) for row in board.boardArray)
-        if opponent_pawns == 0:
-            return True
-
-        # Win condition 3: Opponent has no legal moves
-        has_moves = False
-        for row in range(8):
-            for col in range(8):
-                if board.boardArray[row][col] == opponent:
-                    # Check all possible moves
-                    moves = Rules.get_valid_moves(board, row, col)
-                    if moves:
-                        has_moves = True
-                        break
-                if has_moves:
-                    break
-        
-        return not has_moves
+        return is_win(board.white, board.black, board.ep_square, player)
 
     @staticmethod
     def describe_move(board, from_pos, to_pos):
@@ -156,7 +330,7 @@ class Rules:
             move_desc += f" (captures {board.boardArray[to_row][to_col]} pawn)"
         
         # Check for en passant
-        if board.en_passant_target and to_col == board.en_passant_target[1]:
+        if board.en_passant_target == (to_row, to_col) and from_col != to_col:
             move_desc += " (En Passant capture)"
         
         return move_desc
\ No newline at end of file
@@ -1,4 +1,82 @@
-class GameState:
-    def __init__(self, board, current_player):
-        self.board = board
-        self.current_player = current_player  # 'W' or 'B'
\ No newline at end of file
+from game import rules
+from game.zobrist import compute_key
+
+_new = tuple.__new__
+
+
+class Position(tuple):
+    """
+    Immutable, hashable snapshot of a position: the two colour bitboards, the
+    side to move, the en passant square and the Zobrist key.
+
+    It is a plain 5-tuple underneath, so it is cheap to create, compare, use as a
+    dict key and pickle (workers, caches and the TT can pass it around instead
+    of a ChessBoard with its move history).
+    """
+    __slots__ = ()
+
+    def __new__(cls, white, black, side_to_move='W', ep_square=None, key=None):
+        if key is None:
+            key = compute_key(white, black, side_to_move, ep_square)
+        return _new(cls, (white, black, side_to_move, ep_square, key))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def white(self):
+        return self[0]
+
+    @property
+    def black(self):
+        return self[1]
+
+    @property
+    def side_to_move(self):
+        return self[2]
+
+    @property
+    def ep_square(self):
+        return self[3]
+
+    @property
+    def key(self):
+        return self[4]
+
+    def __hash__(self):
+        return self[4]
+
+    def __repr__(self):
+        return (f"Position(white={self[0]:#018x}, black={self[1]:#018x}, "
+                f"side_to_move={self[2]!r}, ep_square={self[3]!r})")
+
+    @classmethod
+    def from_board(cls, board):
+        """Snapshot a ChessBoard"""
+        return _new(cls, (board.white, board.black, board.side_to_move,
+                          board.ep_square, board.zobrist_key))
+
+    def to_board(self):
+        """A fresh ChessBoard (with empty history) set to this position"""
+        from game.board import ChessBoard
+        return ChessBoard.from_position(self)
+
+    def generate_moves(self):
+        """Int moves of the side to move (see game.moves)"""
+        return rules.generate_moves(self[0], self[1], self[3], self[2])
+
+    def terminal_status(self):
+        """'W' or 'B' if the game is decided in this position, None otherwise"""
+        return rules.winner(self[0], self[1], self[2], self[3])
+
+    def progress(self):
+        """Irreversible progress of the position (see game.rules.progress)"""
+        return rules.progress(self[0], self[1])
+
+    def play(self, move):
+        """
+        Child position after `move` by the side to move (no legality check).
+
+        :param move: Int move with its flags set (see game.moves)
+        """
+        return _new(Position, rules.play(*self, move))
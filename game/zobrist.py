@@ -0,0 +1,49 @@
+"""
+Zobrist hashing keys for the Two Flags board.
+
+The keys come from a fixed seed so a position hashes to the same value in
+every process and every run (worker processes, on-disk books and tables rely
+on that).
+"""
+
+import random
+
+from game.bitboard import en_passant_capturable
+
+_rng = random.Random(0x7F1A65)
+
+ZOBRIST_PIECES = {
+    'W': [_rng.getrandbits(64) for _ in range(64)],
+    'B': [_rng.getrandbits(64) for _ in range(64)],
+}
+ZOBRIST_BLACK_TO_MOVE = _rng.getrandbits(64)
+ZOBRIST_EP_FILE = [_rng.getrandbits(64) for _ in range(8)]
+
+# Not part of a position's key: the search mixes it into its table keys while
+# it searches for black, since its scores depend on the root player
+ZOBRIST_BLACK_ROOT = _rng.getrandbits(64)
+
+del _rng
+
+
+def compute_key(white, black, side_to_move, ep_square):
+    """
+    Hash a position from scratch (setup only; moves update the key incrementally).
+
+    The en passant file is only hashed while the side to move can really take
+    en passant, so a double push nobody can answer doesn't split the position.
+    """
+    key = 0
+    for player, pawns in (('W', white), ('B', black)):
+        table = ZOBRIST_PIECES[player]
+        while pawns:
+            lsb = pawns & -pawns
+            key ^= table[lsb.bit_length() - 1]
+            pawns ^= lsb
+    if side_to_move == 'B':
+        key ^= ZOBRIST_BLACK_TO_MOVE
+    if ep_square is not None:
+        pawns = white if side_to_move == 'W' else black
+        if en_passant_capturable(pawns, ep_square, side_to_move):
+            key ^= ZOBRIST_EP_FILE[ep_square & 7]
+    return key
@@ -0,0 +1,205 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth.
+
+Used to check the move generator after every change to the board code and to
+measure its raw speed. Examples:
+
+    python perft.py --depth 5
+    python perft.py --depth 4 --divide --setup "Wa2 Wb4 Bc4 Bh7"
+    python perft.py --depth 5 --compare board mailbox
+"""
+
+import sys
+import time
+import argparse
+from game.board import ChessBoard, STANDARD_SETUP
+from game.rules import Rules
+from game.moves import CAPTURE, DOUBLE_PUSH, EN_PASSANT, encode, move_to_str
+
+
+def board_moves(board, player):
+    """Moves from the table-driven ChessBoard generator"""
+    return board.generate_moves(player)
+
+
+def rules_moves(board, player):
+    """Moves through Rules.get_valid_moves, the path used to validate user input"""
+    moves = []
+    for row, col in board.get_pawn_positions(player):
+        for to_row, to_col in Rules.get_valid_moves(board, row, col):
+            moves.append(board.encode_move((row, col, to_row, to_col)))
+    return moves
+
+
+def mailbox_moves(board, player):
+    """
+    Reference generator that walks boardArray square by square, written
+    independently of the bitboard rules core so the two can be checked
+    against each other.
+    """
+    grid = board.boardArray
+    ep_target = board.en_passant_target
+    if player == 'W':
+        direction, start_row, ep_row = -1, 6, 3
+    else:
+        direction, start_row, ep_row = 1, 1, 4
+
+    moves = []
+    for row in range(8):
+        for col in range(8):
+            if grid[row][col] != player:
+                continue
+            to_row = row + direction
+            if not 0 <= to_row < 8:
+                continue
+            from_sq = row * 8 + col
+            if grid[to_row][col] == ' ':
+                moves.append(encode(from_sq, to_row * 8 + col))
+                if row == start_row and grid[to_row + direction][col] == ' ':
+                    moves.append(encode(from_sq, (to_row + direction) * 8 + col, DOUBLE_PUSH))
+            for to_col in (col - 1, col + 1):
+                if not 0 <= to_col < 8:
+                    continue
+                target = grid[to_row][to_col]
+                if target != ' ' and target != player:
+                    moves.append(encode(from_sq, to_row * 8 + to_col, CAPTURE))
+                elif ep_target == (to_row, to_col) and row == ep_row:
+                    moves.append(encode(from_sq, to_row * 8 + to_col, CAPTURE | EN_PASSANT))
+    return moves
+
+
+GENERATORS = {
+    'board': board_moves,
+    'rules': rules_moves,
+    'mailbox': mailbox_moves,
+}
+
+
+def perft(board, player, depth, generate=board_moves):
+    """
+    Number of positions reached after exactly `depth` plies.
+    Games that are already decided are not expanded further.
+    """
+    if depth == 0:
+        return 1
+    if board.terminal_status() is not None:
+        return 0
+    moves = generate(board, player)
+    opponent = 'B' if player == 'W' else 'W'
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(move, player)
+        nodes += perft(board, opponent, depth - 1, generate)
+        board.unmake_move(undo)
+    return nodes
+
+
+def divide(board, player, depth, generate=board_moves):
+    """Perft split by root move: list of (move, nodes)"""
+    opponent = 'B' if player == 'W' else 'W'
+    result = []
+    for move in generate(board, player):
+        undo = board.make_move(move, player)
+        result.append((move, perft(board, opponent, depth - 1, generate)))
+        board.unmake_move(undo)
+    return result
+
+
+def find_divergence(board, player, depth, generate_a, generate_b, path=()):
+    """
+    Walk the tree until the two generators disagree.
+
+    :return: None if they agree everywhere, otherwise (path, only_in_a, only_in_b)
+             where path is the list of moves leading to the differing position
+    """
+    if depth == 0 or board.terminal_status() is not None:
+        return None
+    moves_a = set(generate_a(board, player))
+    moves_b = set(generate_b(board, player))
+    if moves_a != moves_b:
+        return list(path), sorted(moves_a - moves_b), sorted(moves_b - moves_a)
+    opponent = 'B' if player == 'W' else 'W'
+    for move in sorted(moves_a):
+        undo = board.make_move(move, player)
+        found = find_divergence(board, opponent, depth - 1, generate_a, generate_b, path + (move,))
+        board.unmake_move(undo)
+        if found:
+            return found
+    return None
+
+
+def make_board(setup, player):
+    board = ChessBoard()
+    board.load_setup(setup)
+    board.set_side_to_move(player)
+    return board
+
+
+def run(board, player, depth, generate, show_divide):
+    """Run one perft, print the result and return (nodes, seconds)"""
+    start_time = time.perf_counter()
+    if show_divide:
+        nodes = 0
+        for move, count in divide(board, player, depth, generate):
+            print(f"{move_to_str(move)}: {count}")
+            nodes += count
+    else:
+        nodes = perft(board, player, depth, generate)
+    elapsed = time.perf_counter() - start_time
+    rate = nodes / elapsed if elapsed > 0 else float('inf')
+    print(f"Nodes: {nodes}  Time: {elapsed:.3f}s  Speed: {rate:,.0f} nodes/sec")
+    return nodes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Two Flags Game - perft move generator test')
+    parser.add_argument('--depth', type=int, default=4, help='Depth in plies')
+    parser.add_argument('--setup', default=STANDARD_SETUP, help='Board setup string (default: standard start)')
+    parser.add_argument('--side', default='W', choices=['W', 'B'], help='Side to move')
+    parser.add_argument('--divide', action='store_true', help='Print node counts per root move')
+    parser.add_argument('--generator', default='board', choices=sorted(GENERATORS),
+                        help='Move generator to count with')
+    parser.add_argument('--compare', nargs=2, metavar=('GEN_A', 'GEN_B'),
+                        help=f"Cross-check two generators ({', '.join(sorted(GENERATORS))})")
+    args = parser.parse_args()
+
+    board = make_board(args.setup, args.side)
+    board.print_board()
+
+    if not args.compare:
+        print(f"\nperft({args.depth}) with '{args.generator}' generator")
+        run(board, args.side, args.depth, GENERATORS[args.generator], args.divide)
+        return
+
+    name_a, name_b = args.compare
+    for name in (name_a, name_b):
+        if name not in GENERATORS:
+            parser.error(f"unknown generator '{name}'")
+
+    results = {}
+    for name in (name_a, name_b):
+        print(f"\nperft({args.depth}) with '{name}' generator")
+        results[name] = run(board, args.side, args.depth, GENERATORS[name], args.divide)
+
+    (nodes_a, time_a), (nodes_b, time_b) = results[name_a], results[name_b]
+    if time_a > 0 and time_b > 0:
+        print(f"\n'{name_a}' is {time_b / time_a:.2f}x the speed of '{name_b}'")
+
+    divergence = find_divergence(board, args.side, args.depth, GENERATORS[name_a], GENERATORS[name_b])
+    if divergence is None and nodes_a == nodes_b:
+        print("Generators agree.")
+        return
+
+    print("MISMATCH between generators")
+    if divergence:
+        path, only_a, only_b = divergence
+        print("  after: " + (' '.join(move_to_str(m) for m in path) or '(root)'))
+        print(f"  only in '{name_a}': " + ' '.join(move_to_str(m) for m in only_a))
+        print(f"  only in '{name_b}': " + ' '.join(move_to_str(m) for m in only_b))
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
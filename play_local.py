@@ -1,12 +1,16 @@
 import sys
 import time
 import argparse
+import multiprocessing
 import pygame
-import threading
-from game.board import ChessBoard
+from game.board import ChessBoard, STANDARD_SETUP
+from game.moves import move_to_str
 from game.timer import GameTimer
 from client.UserInterface import UserInterface
-from search.ai_agent import AIAgent
+from search.ai_agent import AIAgent, SearchLimits
+
+# Seconds left on the AI's clock at which its search is stopped and the best move so far played
+FORCE_MOVE_SECONDS = 1.0
 
 
 def initialize_game(args):
@@ -26,15 +30,7 @@ def initialize_game(args):
         ui = UserInterface(surface, board)
 
         # Set up the board
-        board.clear_board()
-        parts = args.setup.split()
-        for part in parts:
-            if len(part) == 3:
-                color = part[0]
-                col = ord(part[1].lower()) - ord('a')
-                row = 8 - int(part[2])
-                if 0 <= row < 8 and 0 <= col < 8:
-                    board.boardArray[row][col] = color
+        board.load_setup(args.setup)
 
         # Initialize timer
         timer = GameTimer()
@@ -76,10 +72,12 @@ def initialize_game(args):
         black_ai = None
 
         if args.white == "ai":
-            white_ai = AIAgent(algorithm=args.white_algorithm, time_limit_minutes=args.time)
+            white_ai = AIAgent(algorithm=args.white_algorithm, time_limit_minutes=args.time, workers=args.workers,
+                               stats=args.stats, stats_log=args.stats_log)
 
         if args.black == "ai":
-            black_ai = AIAgent(algorithm=args.black_algorithm, time_limit_minutes=args.time)
+            black_ai = AIAgent(algorithm=args.black_algorithm, time_limit_minutes=args.time, workers=args.workers,
+                               stats=args.stats, stats_log=args.stats_log)
 
         return board, surface, ui, timer, white_ai, black_ai, human_player_color
 
@@ -100,11 +98,19 @@ def main():
                            help='White player type (human or ai)')
         parser.add_argument('--black', default='ai', choices=['human', 'ai'],
                            help='Black player type (human or ai)')
-        parser.add_argument('--white-algorithm', default='minmax', choices=['minmax'],
-                           help='Algorithm for white AI (minmax)')
-        parser.add_argument('--black-algorithm', default='minmax', choices=['minmax'],
-                           help='Algorithm for black AI (minmax)')
+        parser.add_argument('--white-algorithm', default='minmax', choices=list(AIAgent.ALGORITHMS),
+                           help='Algorithm for white AI (minmax, pvs or mcts)')
+        parser.add_argument('--black-algorithm', default='minmax', choices=list(AIAgent.ALGORITHMS),
+                           help='Algorithm for black AI (minmax, pvs or mcts)')
         parser.add_argument('--time', type=int, default=30, help='Time limit in minutes')
+        parser.add_argument('--workers', type=int, default=1,
+                           help='Search processes per AI (more than 1 needs the pvs or mcts algorithm)')
+        parser.add_argument('--ponder', action='store_true',
+                           help="Let the AI keep searching on the opponent's time")
+        parser.add_argument('--stats', action='store_true',
+                           help='Print the search statistics after every AI move')
+        parser.add_argument('--stats-log', metavar='FILE',
+                           help='Append the search statistics of every AI move to FILE as JSON lines')
         parser.add_argument('--setup', help='Initial board setup string')
         parser.add_argument('--debug', action='store_true', help='Enable debug output')
 
@@ -116,7 +122,7 @@ def main():
 
         # Default setup if none provided
         if not args.setup:
-            args.setup = "Wa2 Wb2 Wc2 Wd2 We2 Wf2 Wg2 Wh2 Ba7 Bb7 Bc7 Bd7 Be7 Bf7 Bg7 Bh7"
+            args.setup = STANDARD_SETUP
 
         # Initialize game components
         board, surface, ui, timer, white_ai, black_ai, human_player_color = initialize_game(args)
@@ -127,31 +133,27 @@ def main():
         game_over = False
         winner = None  # Variable to store the winner
 
-        # Function to let AI make a move in a separate thread
-        def ai_move_thread():
-            nonlocal current_player, game_over, winner
-
-            ai = white_ai if current_player == 'W' else black_ai
-            if not ai:
-                return
+        def stop_ai():
+            """End every AI search running in the background: pondering and the search for a move"""
+            for ai in (white_ai, black_ai):
+                if ai:
+                    ai.stop_search()
+                    ai.stop_pondering()
 
-            print(f"AI ({current_player}) is thinking...")
+        # Play the move an AI search came up with (called from the main loop)
+        def finish_ai_move(ai, search):
+            nonlocal current_player, game_over, winner
 
             try:
-                # Get AI move
-                move_str = ai.get_move(board, current_player)
-
-                # Parse the move
-                from_col = ord(move_str[0]) - ord('a')
-                from_row = 8 - int(move_str[1])
-                to_col = ord(move_str[2]) - ord('a')
-                to_row = 8 - int(move_str[3])
-
-                move_coords = [from_row, from_col, to_row, to_col]
-                print(f"AI chose move: {move_str}")
+                # An int move, no text round trip
+                move = search.result()
+                if move is None:
+                    print(f"AI ({current_player}) has no moves")
+                    return
+                print(f"AI chose move: {move_to_str(move)}")
 
                 # Apply the move
-                board.computeMove(move_coords, current_player)
+                board.computeMove(move, current_player)
 
                 # Update UI to ensure the move is visible
                 ui.drawComponent()
@@ -167,6 +169,7 @@ def main():
                     # Critical: Set game state first, then update UI
                     game_over = True
                     winner = current_player
+                    stop_ai()
                     
                     # Update game state in UI
                     ui.set_game_over(winner)
@@ -184,6 +187,10 @@ def main():
                     # Set timer for delayed exit AFTER updating the UI
                     pygame.time.set_timer(pygame.USEREVENT, 5000)  # 5 second delay before auto-close
                 else:
+                    # Think about the expected reply while the opponent moves
+                    if args.ponder:
+                        ai.start_pondering(board, current_player)
+
                     # Switch turns
                     current_player = 'B' if current_player == 'W' else 'W'
                     timer.switch_timer(current_player)  # Switch timer when turns change
@@ -201,8 +208,9 @@ def main():
                 import traceback
                 traceback.print_exc()
 
-        # AI moves need to happen in a separate thread so the UI remains responsive
-        ai_thread = None
+        # The AI searches in the background (see AIAgent.start_search) so the UI
+        # remains responsive; the main loop plays its move once it is done
+        ai_search = None
 
         # Main game loop
         clock = pygame.time.Clock()
@@ -232,9 +240,7 @@ def main():
                         move = ui.handle_click(pos)
 
                         if move:
-                            from_row, from_col, to_row, to_col = move
-                            move_str = f"{chr(from_col + ord('a'))}{8 - from_row}{chr(to_col + ord('a'))}{8 - to_row}"
-                            print(f"Human made move: {move_str}")
+                            print(f"Human made move: {move_to_str(move)}")
 
                             # Apply the move
                             board.computeMove(move, current_player)
@@ -250,6 +256,7 @@ def main():
 
                                 game_over = True
                                 winner = current_player
+                                stop_ai()
                                 ui.set_game_over(winner)
                                 ui.display_winner(winner)
                                 timer.stop()  # Stop the timer on game over
@@ -290,6 +297,7 @@ def main():
                             print("Black ran out of time! White wins!")
 
                         game_over = True
+                        stop_ai()
                         ui.set_game_over(winner)
                         ui.display_winner(winner)
                         timer.stop()
@@ -307,10 +315,19 @@ def main():
             if not game_over:
                 is_ai_turn = current_player != human_player_color
 
-                if is_ai_turn and (ai_thread is None or not ai_thread.is_alive()):
-                    ai_thread = threading.Thread(target=ai_move_thread)
-                    ai_thread.daemon = True
-                    ai_thread.start()
+                ai = white_ai if current_player == 'W' else black_ai
+                if is_ai_turn and ai:
+                    if ai_search is None:
+                        print(f"AI ({current_player}) is thinking...")
+                        # Plan with the time really left on this side's clock
+                        ai_search = ai.start_search(board, SearchLimits(time_left=timer.get_time(current_player)),
+                                                    player_color=current_player)
+                    elif ai_search.done():
+                        search, ai_search = ai_search, None
+                        finish_ai_move(ai, search)
+                    elif timer.get_time(current_player) <= FORCE_MOVE_SECONDS:
+                        # Out of time: play the best move found so far rather than lose on the clock
+                        ai_search.stop()
 
             # Update the UI (always, even if game is over)
             ui.drawComponent()
@@ -322,6 +339,7 @@ def main():
                 print(f"Game over state active. Winner: {winner}")
 
         # Clean up
+        stop_ai()
         timer.stop()
         pygame.quit()
         print("Game ended!")
@@ -339,5 +357,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Search helper processes need this in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     print("Starting script...")
     main()
\ No newline at end of file
@@ -3,73 +3,369 @@ Enhanced AI Agent module for the Two Flags game.
 With an added double-check if we get None from Minimax.
 """
 
-import time
+import json
 import random
+import threading
+from concurrent.futures import Future
+from game.moves import move_to_str
+from game.state import Position
+from search.book import DEFAULT_PATH as DEFAULT_BOOK_PATH, OpeningBook
+from search.tablebase import DEFAULT_PATH as DEFAULT_TABLEBASE_PATH, Tablebase
+
+class SearchLimits:
+    def __init__(self, time_left=None, move_time=None, infinite=False):
+        """
+        What a search started with AIAgent.start_search may spend.
+
+        Args:
+            time_left (float): Seconds left on our clock (see AIAgent.update_clock)
+            move_time (float): Fixed seconds for this move instead of a share of the clock
+            infinite (bool): Search until stopped (analysis); the clock is not charged
+        """
+        self.time_left = time_left
+        self.move_time = move_time
+        self.infinite = infinite
+
+
+class SearchHandle:
+    def __init__(self, engine, position):
+        """
+        A search running in the background, returned by AIAgent.start_search.
+        `future` is a concurrent.futures.Future resolving to the chosen int
+        move (None if there is no move).
+        """
+        self.future = Future()
+        self._engine = engine
+        self._position = position
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stop(self):
+        """Ask the search to end now; it still resolves, with the deepest completed iteration's move"""
+        self._stop.set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """The chosen move, waiting up to `timeout` seconds (None: as long as it takes)"""
+        return self.future.result(timeout)
+
+    def best_so_far(self):
+        """The chosen move once done, else the best move of the deepest iteration completed so far (or None)"""
+        if self.future.done():
+            return self.future.result()
+        # Until the search has set up its root the engine still reports the previous one
+        if self._engine.root_position != self._position:
+            return None
+        return self._engine.best_so_far()
+
+    def add_done_callback(self, fn):
+        """Call fn(handle) when the search is done, from the search thread (at once if it already is)"""
+        self.future.add_done_callback(lambda future: fn(self))
+
 
 class AIAgent:
-    def __init__(self, algorithm="minmax", time_limit_minutes=30):
+    # Search engines selectable with the `algorithm` argument
+    ALGORITHMS = ("minmax", "pvs", "mcts")
+
+    def __init__(self, algorithm="minmax", time_limit_minutes=30, tt_size_mb=16, workers=1,
+                 tablebase_path=DEFAULT_TABLEBASE_PATH, book_path=DEFAULT_BOOK_PATH, stats=False, stats_log=None):
         """
         Initialize a stronger AI agent for the Two Flags game.
         
         Args:
-            algorithm (str): The search algorithm to use (only "minmax" is supported)
+            algorithm (str): The search algorithm to use ("minmax", "pvs" or "mcts")
             time_limit_minutes (int): Time limit for the entire game in minutes
+            tt_size_mb (int): Memory budget of the transposition table in megabytes
+                              (of the search tree for "mcts")
+            workers (int): Search processes; more than 1 runs "pvs" as a Lazy SMP search
+                           and spreads the "mcts" playouts over that many processes
+            tablebase_path (str): Pawn endgame tablebase built by build_tablebase.py;
+                                  used if the file exists, None to play without one
+            book_path (str): Opening book built by build_book.py; used the same way
+            stats (bool): Print the search statistics after every move
+            stats_log (str): File to append the statistics of every move to, one JSON object per line
         """
-        self.algorithm = "minmax"  # Always use minmax
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}' (choose from {', '.join(self.ALGORITHMS)})")
+        if workers > 1 and algorithm == "minmax":
+            raise ValueError("Parallel search (workers > 1) needs the pvs or mcts algorithm")
+        self.algorithm = algorithm
+        self.workers = workers
         self.time_limit = time_limit_minutes * 60
+        self.stats = stats
+        self.stats_log = stats_log
+        # Statistics of the last choose_move (see search.minmax.Minmax.search_report)
+        self.last_report = None
         print(f"[AI Agent] Initialized with {self.algorithm} algorithm and a total time of {time_limit_minutes} minutes.")
+
+        tablebase = Tablebase.load(tablebase_path) if tablebase_path else None
+        if tablebase is not None:
+            print(f"[AI Agent] Using the tablebase {tablebase.path} (up to {tablebase.max_pawns} pawns per side).")
+        self.book = OpeningBook.load(book_path) if book_path else None
+        if self.book is not None:
+            print(f"[AI Agent] Using the opening book {self.book.path} ({self.book.entries} positions).")
         
         try:
-            from search.minmax import Minmax
-            self.search_engine = Minmax(total_time_minutes=time_limit_minutes)
+            if algorithm == "mcts":
+                from search.mcts import MCTS
+                self.search_engine = MCTS(total_time_minutes=time_limit_minutes, tree_size_mb=tt_size_mb,
+                                          workers=workers, tablebase=tablebase)
+            elif workers > 1:
+                from search.smp import LazySMP
+                self.search_engine = LazySMP(total_time_minutes=time_limit_minutes, tt_size_mb=tt_size_mb,
+                                             workers=workers, tablebase=tablebase)
+            elif algorithm == "pvs":
+                from search.negamax import Negamax
+                self.search_engine = Negamax(total_time_minutes=time_limit_minutes, tt_size_mb=tt_size_mb,
+                                             tablebase=tablebase)
+            else:
+                from search.minmax import Minmax
+                self.search_engine = Minmax(total_time_minutes=time_limit_minutes, tt_size_mb=tt_size_mb,
+                                            tablebase=tablebase)
         except ImportError:
-            print("Error: Minmax algorithm not available.")
+            print(f"Error: {algorithm} algorithm not available.")
             raise
 
+        # Background search on the opponent's time (see start_pondering)
+        self._ponder_thread = None
+        self._ponder_position = None
+        self._ponder_result = None
+        self._ponder_stop = threading.Event()
+
+        # Background search for our own move (see start_search)
+        self._search = None
+
+    def update_clock(self, seconds_left):
+        """
+        Tell the engine how much time we really have left, in seconds (from
+        GameTimer or the server's TIMER messages), so its time budget follows
+        the real clock instead of its own estimate
+        """
+        self.search_engine.set_remaining_time(seconds_left)
+
     def get_move(self, board, player_color):
-        start_time = time.time()
-        print(f"[AI Agent] Thinking... (Player = {player_color})")
+        """Best move as algebraic text (e.g. 'a2a4'), for the text protocols"""
+        move = self.choose_move(board, player_color)
+        if move is None:
+            # Indeed no moves => We are truly stuck
+            print("[AI Agent] No moves exist. Using fallback.")
+            return "a2a3" if player_color == 'W' else "a7a6"
+        return self._move_to_algebraic(move)
 
-        move = self.search_engine.get_best_move(board, player_color)
+    def choose_move(self, board, player_color, stop=None):
+        """
+        Best move as an int move (see game.moves), ready for board.computeMove
+        without a round trip through text. None if there is no move.
+
+        Args:
+            stop (threading.Event): Setting it ends the search early with the
+                                    move of its deepest completed iteration
+        """
+        if self.book is not None:
+            move = self.book.best_move(board, player_color)
+            if move is not None:
+                # In book: no search, no time off the clock
+                self.stop_pondering()
+                print(f"[AI Agent] Book move {move_to_str(move)} (Player = {player_color})")
+                self._report({'player': player_color, 'source': 'book', 'move': move_to_str(move)})
+                return move
+
+        if self._ponder_thread is not None and self._ponder_position == board.to_position():
+            print(f"[AI Agent] Ponderhit, continuing the search... (Player = {player_color})")
+            if stop is not None:
+                ponder_stop = self._ponder_stop
+                self.search_engine.abort_check = lambda: ponder_stop.is_set() or stop.is_set()
+            self.search_engine.ponderhit()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+            move = self._ponder_result
+        else:
+            self.stop_pondering()
+            print(f"[AI Agent] Thinking... (Player = {player_color})")
+            self.search_engine.abort_check = stop.is_set if stop is not None else None
+            try:
+                move = self.search_engine.get_best_move(board, player_color)
+            finally:
+                self.search_engine.abort_check = None
+        self._report(self.search_engine.search_report(move))
 
         if move is None:
             # The engine didn't find a best move, so let's see if there really are no moves
             all_moves = self.search_engine._get_all_moves(board, player_color)
             if not all_moves:
-                # Indeed no moves => We are truly stuck
-                print("[AI Agent] No moves exist. Using fallback.")
-                return "a2a3" if player_color == 'W' else "a7a6"
-            else:
-                # We do have moves but Minimax returned None => likely a transient sync issue
-                print("[AI Agent] Minimax returned None, but moves exist. Picking a fallback from the real moves.")
-                fallback = random.choice(all_moves)
-                return self._move_to_algebraic(fallback)
-        
+                return None
+            # We do have moves but Minimax returned None => likely a transient sync issue
+            print("[AI Agent] Minimax returned None, but moves exist. Picking a fallback from the real moves.")
+            return random.choice(all_moves)
+
         # If we did get a valid move from Minimax, we’re fine:
-        end_time = time.time()
-        move_algebraic = self._move_to_algebraic(move)
-        return move_algebraic
+        return move
+
+    # -------------- Background search --------------
+
+    def start_search(self, position, limits=None, player_color=None, callback=None):
+        """
+        Choose a move in a background thread (as choose_move does) and return
+        at once, so the caller stays responsive and can end the search any
+        time with handle.stop(). A search still running from an earlier call
+        is stopped first.
+
+        Args:
+            position: ChessBoard or Position to move in; copied, so the caller
+                      may keep using its board
+            limits (SearchLimits): Clock and time limits; None plans with the clock as it is
+            player_color (str): Side to choose a move for; default the position's side to move
+            callback: Optional fn(handle), called from the search thread when it is done
+
+        Returns:
+            SearchHandle
+        """
+        self.stop_search()
+        board = position.to_board() if isinstance(position, Position) else position.copy()
+        player = player_color or board.side_to_move
+        limits = limits or SearchLimits()
+        engine = self.search_engine
+        handle = SearchHandle(engine, Position(board.white, board.black, player, board.ep_square))
+        if callback is not None:
+            handle.add_done_callback(callback)
+
+        def search():
+            saved_move_time = engine.move_time
+            try:
+                if limits.time_left is not None:
+                    self.update_clock(limits.time_left)
+                if limits.move_time is not None:
+                    engine.move_time = limits.move_time
+                if limits.infinite:
+                    self.stop_pondering()
+                    engine.pondering = True
+                move = self.choose_move(board, player, stop=handle._stop)
+            except Exception as e:
+                handle.future.set_exception(e)
+            else:
+                handle.future.set_result(move)
+            finally:
+                engine.move_time = saved_move_time
+                if limits.infinite:
+                    engine.pondering = False
+
+        handle._thread = threading.Thread(target=search, daemon=True)
+        self._search = handle
+        handle._thread.start()
+        return handle
+
+    def stop_search(self, timeout=None):
+        """
+        Stop the search started by start_search, if it is still running, and
+        wait up to `timeout` seconds for it to end (None: until it has)
+        """
+        handle = self._search
+        if handle is None:
+            return
+        handle.stop()
+        handle._thread.join(timeout)
+        if not handle._thread.is_alive():
+            self._search = None
+
+    # -------------- Statistics --------------
+
+    def _report(self, report):
+        """Keep the statistics of a move, print them and log them as asked"""
+        self.last_report = report
+        if self.stats:
+            self._print_report(report)
+        if self.stats_log:
+            with open(self.stats_log, 'a') as f:
+                f.write(json.dumps(report) + "\n")
+
+    @staticmethod
+    def _print_report(report):
+        if report['source'] == 'book':
+            return
+        if 'playouts' in report:
+            for record in report['root_moves']:
+                print(f"[Stats]   {record['move']}  visits {record['visits']:8}  win rate {record['win_rate']:.1%}")
+            print(f"[Stats] {report['move']} ({report['source']}): {report['playouts']} playouts "
+                  f"in {report['time']:.3f}s ({report['playouts_per_sec']} per second), "
+                  f"tree {report['tree_nodes']} nodes, {report['reused_visits']} playouts reused")
+            print(f"[Stats] PV: {' '.join(report['pv'])}")
+            return
+        for record in report['iterations']:
+            print(f"[Stats]   depth {record['depth']:2}  {record['move']}  score {record['score']:9.1f}  "
+                  f"nodes {record['nodes']:9}  {record['time']:7.3f}s  {record['nps']:8} nps")
+        cutoff_rate = report['first_move_cutoff_rate']
+        print(f"[Stats] {report['move']} ({report['source']}): depth {report['depth']}, "
+              f"{report['nodes']} nodes in {report['time']:.3f}s ({report['nps']} nps), "
+              f"TT hits {report['tt']['hit_rate']:.1%} / cutoffs {report['tt_cutoffs']} / "
+              f"fill {report['tt']['fill']:.1%} ({report['tt']['live']:.1%} live), "
+              f"first-move cutoffs {'-' if cutoff_rate is None else f'{cutoff_rate:.1%}'}, "
+              f"EBF {'-' if report['ebf'] is None else report['ebf']}")
+        print(f"[Stats] PV: {' '.join(report['pv'])}")
+
+    # -------------- Pondering --------------
+
+    def start_pondering(self, board, player_color):
+        """
+        Search on the opponent's time. Call right after our own move has been
+        played on `board`: the opponent's most likely reply (as the engine's
+        last search saw it) is played on a copy and our answer to it is
+        searched in a background thread, with no time limit. The next
+        choose_move either picks that search up if the reply was right
+        (ponderhit) or aborts it and searches afresh; either way the engine
+        keeps what the ponder search found.
+        """
+        self.stop_pondering()
+        engine = self.search_engine
+        opponent = 'B' if player_color == 'W' else 'W'
+
+        ponder_board = board.copy()
+        ponder_board.set_side_to_move(opponent)
+        if ponder_board.terminal_status() is not None:
+            return
+        reply = engine._expected_reply(ponder_board, opponent)
+        if reply is None:
+            return
+        ponder_board.make_move(reply, opponent)
+        if ponder_board.terminal_status() is not None:
+            return
+
+        print(f"[AI Agent] Pondering on {move_to_str(reply)}...")
+        self._ponder_position = ponder_board.to_position()
+        self._ponder_result = None
+        self._ponder_stop.clear()
+        engine.abort_check = self._ponder_stop.is_set
+        engine.pondering = True
+
+        def ponder():
+            try:
+                self._ponder_result = engine.get_best_move(ponder_board, player_color)
+            finally:
+                engine.abort_check = None
 
+        self._ponder_thread = threading.Thread(target=ponder, daemon=True)
+        self._ponder_thread.start()
 
+    def stop_pondering(self):
+        """Abort a running ponder search, if any, and wait for it to unwind"""
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self.search_engine.pondering = False
 
     def _move_to_algebraic(self, move):
-        """Convert numeric move (from_row, from_col, to_row, to_col) to algebraic notation."""
-        from_row, from_col, to_row, to_col = move
-        from_algebraic = chr(from_col + ord('a')) + str(8 - from_row)
-        to_algebraic = chr(to_col + ord('a')) + str(8 - to_row)
-        return from_algebraic + to_algebraic
+        """Convert an int move to algebraic notation."""
+        return move_to_str(move)
 
     def _get_random_move(self, board, player_color):
         """
         Example of a random-move generator (fallback).
         Typically not used unless no better move was found.
         """
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                if board.boardArray[row][col] == player_color:
-                    moves = board.get_valid_moves(row, col)
-                    valid_moves.extend((row, col, to_row, to_col) for to_row, to_col in moves)
+        valid_moves = board.generate_moves(player_color)
         
         if valid_moves:
             move = random.choice(valid_moves)
@@ -77,4 +373,3 @@ class AIAgent:
         
         # If no valid moves, return a default
         return "a2a3" if player_color == 'W' else "a7a6"
- 
\ No newline at end of file
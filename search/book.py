@@ -0,0 +1,112 @@
+"""
+Opening book: precomputed moves for the first plies of the game.
+
+The file is an 8-byte header (b'TFOB', version, 3 spare bytes) followed by
+12-byte entries sorted by key: the position's Zobrist key (8 bytes), an int
+move (2 bytes, see game.moves) and a weight (2 bytes; the builder stores the
+depth the move was searched to). A position may have several entries. The
+file is memory-mapped and looked up with a binary search, so opening it
+costs nothing and a probe reads a handful of entries.
+
+build_book.py writes the file.
+"""
+
+import mmap
+import os
+import struct
+
+MAGIC = b'TFOB'
+VERSION = 1
+HEADER_BYTES = 8
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tables', 'book.bin')
+
+_ENTRY = struct.Struct('<QHH')
+_KEY = struct.Struct('<Q')
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Memory-map a book file.
+
+        :raises OSError: If the file can't be opened
+        :raises ValueError: If the file is not a book of this version
+        """
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._data[:HEADER_BYTES]
+        if header[:4] != MAGIC or header[4] != VERSION or (len(self._data) - HEADER_BYTES) % _ENTRY.size:
+            self._data.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.path = path
+        self.entries = (len(self._data) - HEADER_BYTES) // _ENTRY.size
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """The book at `path`, or None if there is none (the engines play without one)"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"[Book] Not using {path}: {e}")
+            return None
+
+    def close(self):
+        self._data.close()
+
+    def _key_at(self, index):
+        return _KEY.unpack_from(self._data, HEADER_BYTES + index * _ENTRY.size)[0]
+
+    def probe(self, key):
+        """
+        All book moves for a position.
+
+        :param key: The position's Zobrist key (ChessBoard.zobrist_key)
+        :return: List of (move, weight), best weight first; empty if the position is not in the book
+        """
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        moves = []
+        while lo < self.entries:
+            entry_key, move, weight = _ENTRY.unpack_from(self._data, HEADER_BYTES + lo * _ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+            lo += 1
+        moves.sort(key=lambda entry: entry[1], reverse=True)
+        return moves
+
+    def best_move(self, board, player):
+        """
+        The highest-weighted book move that is legal on `board` for `player`,
+        or None if the position is out of book.
+        """
+        board = board.copy()
+        board.set_side_to_move(player)
+        legal = board.generate_moves(player)
+        for move, _ in self.probe(board.zobrist_key):
+            if move in legal:
+                return move
+        return None
+
+
+def write_book(path, entries):
+    """
+    Write a book file.
+
+    :param entries: Iterable of (key, move, weight); written sorted by key
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(MAGIC + bytes([VERSION, 0, 0, 0]))
+        for key, move, weight in sorted(entries):
+            f.write(_ENTRY.pack(key, move, min(weight, 0xFFFF)))
@@ -0,0 +1,246 @@
+"""
+What every search engine shares: the outline of get_best_move, the clock,
+the basic statistics of the last search, tablebase lookups at the root and
+the move helpers. The engines (Minmax and its subclasses, MCTS) fill in
+_prepare_search and _search.
+"""
+
+import time
+from typing import List, Optional
+from game.bitboard import popcount
+from game.moves import CAPTURE
+from game.state import Position
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when it has to stop at once"""
+
+
+class SearchEngine:
+    def __init__(self, total_time_minutes=30, tablebase=None):
+        """
+        Time control and bookkeeping common to all engines.
+        With a search.tablebase.Tablebase, root positions it covers are
+        answered from it without searching.
+        """
+        self.total_time = total_time_minutes * 60
+        self.remaining_time = self.total_time
+        self.nodes_visited = 0
+
+        # Each search gets a soft limit (the engine stops at it when it can)
+        # and a hard limit (the search is aborted at it, see _poll)
+        self.TIME_SAFETY_MARGIN = 1.0   # Seconds of the clock never planned for
+        self.MIN_MOVE_TIME = 0.05       # Seconds, even when the clock is almost out
+        self.HARD_LIMIT_FACTOR = 4.0    # Hard limit as a multiple of the soft limit...
+        self.MAX_CLOCK_FRACTION = 0.25  # ...but never more than this share of the clock
+        self.move_time = None           # Fixed seconds per move instead (analysis, book building)
+        self.soft_time = 0.0
+        self.hard_time = 0.0
+        self.start_time = None
+
+        # Optional callable polled during the search; when it returns True
+        # the search unwinds with SearchAborted
+        self.abort_check = None
+
+        # While pondering (searching on the opponent's time) the time budget is
+        # ignored until ponderhit(); only an abort ends the search early
+        self.pondering = False
+
+        self.tablebase = tablebase
+
+        # Statistics of the last search (see search_report)
+        self.root_position = None
+        self.search_time = 0.0
+        self.result_source = 'search'
+
+    # -------------- Search --------------
+
+    def get_best_move(self, board, player: str) -> Optional[int]:
+        """
+        Search until the time is up and return the chosen int move (see
+        game.moves), or None if `player` has no move.
+        `board` may be a ChessBoard or an immutable Position.
+        """
+        if isinstance(board, Position):
+            board = board.to_board()
+        self._start_clock(board)
+        self._reset_search_stats(board, player)
+        self._prepare_search(board, player)
+
+        all_moves = self._get_all_moves(board, player)
+        if not all_moves:
+            return None
+        if len(all_moves) == 1:
+            return all_moves[0]
+
+        # Search on a private copy so the caller's board (drawn by the UI while
+        # we think) is never touched
+        search_board = self._copy_board(board)
+        search_board.set_side_to_move(player)
+
+        best_move = self._tablebase_move(search_board, player, all_moves)
+        if best_move is None:
+            best_move = self._search(search_board, player, all_moves)
+        self._stop_clock()
+
+        if best_move is None:
+            # The search had no time to settle on anything: play the best-looking move
+            best_move = self._pre_sort_moves(board, player, all_moves)[0]
+        elif not self._is_valid_move(board, best_move, player):
+            print(f"[{type(self).__name__}] WARNING: the search chose an invalid move. Falling back.")
+            best_move = self._pre_sort_moves(board, player, all_moves)[0]
+        return best_move
+
+    def _prepare_search(self, board, player: str):
+        """Per-search setup, after the clock and the statistics are reset"""
+
+    def _search(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """
+        The engine's search of `board` (a private copy, `player` to move)
+        over its legal `moves`, of which there are at least two.
+
+        :return: The best move found, or None if there was no time to find one
+        """
+        raise NotImplementedError
+
+    # -------------- Statistics --------------
+
+    def _reset_search_stats(self, board, player: str):
+        self.nodes_visited = 0
+        self.search_time = 0.0
+        self.result_source = 'search'
+        # Last, so best_so_far() never pairs this root with the previous search's move
+        self.root_position = Position(board.white, board.black, player, board.ep_square)
+
+    # -------------- Time control --------------
+
+    def set_remaining_time(self, seconds: float):
+        """Sync with the real clock (GameTimer or the server): our time left, in seconds"""
+        self.remaining_time = max(0.0, float(seconds))
+
+    def ponderhit(self):
+        """
+        The opponent played the move being pondered: the running search goes
+        on as a normal one, with a time budget counted from now and worked
+        out from the clock as it is now (see set_remaining_time), not as it
+        was when pondering started
+        """
+        self.start_time = time.monotonic()
+        self.soft_time, self.hard_time = self._allocate_time(self.root_position)
+        self.pondering = False
+
+    def _allocate_time(self, board):
+        """
+        Soft and hard limits in seconds for a move: an even share of the clock
+        over the moves expected to be left, the hard one a few times more but
+        capped so a single move can't lose the game on time
+        """
+        if self.move_time is not None:
+            return self.move_time, self.move_time
+        usable = max(0.0, self.remaining_time - self.TIME_SAFETY_MARGIN)
+        soft = usable / (self._estimate_remaining_moves(board) + 2)
+        hard = min(soft * self.HARD_LIMIT_FACTOR, usable * self.MAX_CLOCK_FRACTION)
+        return max(self.MIN_MOVE_TIME, soft), max(self.MIN_MOVE_TIME, hard)
+
+    def _start_clock(self, board):
+        self.start_time = time.monotonic()
+        self.soft_time, self.hard_time = self._allocate_time(board)
+
+    def _stop_clock(self):
+        """Charge the search to the clock (pondering costs us nothing)"""
+        self.search_time = time.monotonic() - self.start_time
+        if not self.pondering:
+            self.remaining_time -= self.search_time
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def _past_hard_limit(self) -> bool:
+        return not self.pondering and self._elapsed() >= self.hard_time
+
+    def _poll(self):
+        """
+        Called regularly during the search; raises SearchAborted if the hard
+        time limit has passed or the search must stop for another reason
+        """
+        if self._past_hard_limit() or (self.abort_check is not None and self.abort_check()):
+            raise SearchAborted()
+
+    def _estimate_remaining_moves(self, board) -> int:
+        """Moves left to plan for; `board` may be a ChessBoard or a Position"""
+        total_pawns = popcount(board.white | board.black)
+        return max(6, total_pawns * 2)
+
+    # -------------- Tablebase --------------
+
+    def _tablebase_move(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """
+        Best root move straight from the tablebase: the quickest win, else the
+        slowest loss. None if the root or one of its children isn't covered,
+        in which case the position is searched as usual.
+        """
+        if self.tablebase is None or self.tablebase.probe(board) is None:
+            return None
+        position = board.to_position()
+        best_move = None
+        best_rank = None
+        for move in moves:
+            child = position.play(move)
+            winner = child.terminal_status()
+            if winner is not None:
+                win, distance = winner == player, 0
+            else:
+                result = self.tablebase.probe(child)
+                if result is None:
+                    return None
+                child_wins, distance = result
+                win = not child_wins
+            # Wins rank above losses, quick wins above slow ones, slow losses above quick ones
+            rank = (win, -distance if win else distance)
+            if best_rank is None or rank > best_rank:
+                best_rank = rank
+                best_move = move
+        self.result_source = 'tablebase'
+        return best_move
+
+    # -------------- Board / Move helpers --------------
+
+    def _pre_sort_moves(self, board, player: str, moves: List[int]) -> List[int]:
+        scored = []
+        for m in moves:
+            sc = 0
+            # Bonus for captures
+            if m & CAPTURE:
+                sc += 50
+            # Encourage promotion
+            tr = (m >> 9) & 7
+            if player=='W':
+                sc += (7 - tr)
+                if tr==0: sc += 100
+            else:
+                sc += tr
+                if tr==7: sc += 100
+
+            scored.append((m, sc))
+
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return [mv for mv,_ in scored]
+
+    def _expected_reply(self, board, player: str) -> Optional[int]:
+        """
+        The move `player` most likely plays on `board` (for pondering): the
+        first by static ordering. None if there is no move.
+        """
+        moves = self._get_all_moves(board, player)
+        if not moves:
+            return None
+        return self._pre_sort_moves(board, player, moves)[0]
+
+    def _copy_board(self, board):
+        return board.copy()
+
+    def _is_valid_move(self, board, move: int, player: str) -> bool:
+        return move in board.generate_moves(player)
+
+    def _get_all_moves(self, board, player: str) -> List[int]:
+        return board.generate_moves(player)
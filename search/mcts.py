@@ -0,0 +1,345 @@
+"""
+Monte Carlo tree search (UCT).
+
+Every playout walks down the tree from the root choosing children by UCB1,
+adds one node, and finishes the game from there with fast, lightly biased
+random moves on bare bitboards: a push onto the goal row is always played
+and captures are preferred. Two Flags has no draws, so a playout is a win
+for one side, and the result is backed up the path. The most visited root
+move is played.
+
+The tree is kept between moves: the next search starts from the node of the
+position actually reached when our move and the reply are in the tree.
+
+With workers > 1 the playouts run in several processes (root
+parallelisation): helper processes grow their own trees from the same root,
+kept between moves as well, and their root visit counts are added to this
+one's when the search ends.
+"""
+
+import atexit
+import math
+import random
+import time
+from typing import List, Optional
+
+from game import rules
+from game.bitboard import popcount
+from game.moves import CAPTURE, move_to_str
+from game.state import Position
+from search.engine import SearchEngine, SearchAborted
+from search.pool import HelperPool, open_tablebase, run_helper
+
+
+class _Node:
+    """A position in the tree, reached by `move` from its parent"""
+    __slots__ = ('position', 'move', 'parent', 'children', 'untried', 'winner', 'visits', 'wins')
+
+    def __init__(self, position, move=0, parent=None, rng=random):
+        self.position = position
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.winner = position.terminal_status()
+        self.untried = []
+        if self.winner is None:
+            # Expanded last to first: moves that reach the goal row come out
+            # first, the rest in random order
+            goal = 0 if position.side_to_move == 'W' else 7
+            moves = position.generate_moves()
+            rng.shuffle(moves)
+            moves.sort(key=lambda m: (m >> 9) & 7 == goal)
+            self.untried = moves
+        self.visits = 0
+        self.wins = 0  # Playouts won by the side that made `move`
+
+
+def _helper_main(worker_id, tree_size_mb, tablebase_path, jobs, results, active_search):
+    """
+    Helper process (see search.pool): run playouts until the main process
+    ends the search, then report the root's children.
+    Jobs are (search_id, position).
+    """
+    engine = MCTS(tree_size_mb=tree_size_mb, tablebase=open_tablebase(tablebase_path))
+    engine.rng.seed(worker_id)
+    # No time limit of its own: the helper searches until the main search is done
+    engine.pondering = True
+
+    def search(search_id, position):
+        engine.abort_check = lambda: active_search.value != search_id
+        engine.start_time = time.monotonic()
+        engine.playouts = 0
+        root = engine._set_root(position)
+        engine._run(root)
+        results.put((search_id, worker_id, engine._root_counts(root), engine.playouts))
+
+    run_helper(jobs, active_search, search)
+
+
+class MCTS(SearchEngine):
+    def __init__(self, total_time_minutes=30, tree_size_mb=16, workers=1, tablebase=None):
+        """
+        UCT search with random playouts. The tree is bounded to about
+        `tree_size_mb` megabytes; once full, playouts start from its leaves
+        without adding nodes. With `workers` > 1, workers - 1 helper processes
+        are started on the first search and kept alive until close().
+
+        Time budget, pondering and the tablebase at the root work as for the
+        other engines (see search.engine).
+        """
+        super().__init__(total_time_minutes, tablebase)
+
+        self.EXPLORATION = 1.4      # UCB1 exploration constant
+        self.CAPTURE_BIAS = 0.5     # Chance a playout move is a capture, when there is one
+        self.POLL_INTERVAL = 16     # Playouts between time checks
+        self.NODE_BYTES = 400       # Rough memory cost of a tree node
+        self.tree_size_mb = tree_size_mb
+        self.max_nodes = max(1000, tree_size_mb * 1024 * 1024 // self.NODE_BYTES)
+        self.rng = random.Random()
+
+        self.root = None
+        self.tree_nodes = 0
+        self.playouts = 0
+        self.reused_visits = 0      # Playouts the root already had from earlier searches
+        self.helper_playouts = 0
+        self.root_counts = {}       # Move => (visits, wins) over all processes, last search
+
+        self.workers = max(1, workers)
+        self._pool = None  # Started on the first search when workers > 1
+        atexit.register(self.close)
+
+    def _prepare_search(self, board, player: str):
+        self.playouts = 0
+        self.helper_playouts = 0
+        self.root_counts = {}
+
+    def _search(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """Playouts until the time is up (in every process); the most visited move is played"""
+        position = board.to_position()
+        for move in moves:
+            if position.play(move).terminal_status() == player:
+                # Random playouts need not find a win in one straight away
+                return move
+
+        root = self._set_root(position)
+        self.reused_visits = root.visits
+
+        if self.workers > 1:
+            if self._pool is None:
+                self._pool = HelperPool(_helper_main, self.workers,
+                                        (self.tree_size_mb, self.tablebase.path if self.tablebase else None))
+            self._pool.begin_search(position)
+
+        self._run(root)
+
+        counts = self._root_counts(root)
+        if self._pool is not None:
+            for _, helper_counts, playouts in self._pool.end_search(wait=0.5, expected=self.workers - 1):
+                self.helper_playouts += playouts
+                for move, (visits, wins) in helper_counts.items():
+                    total_visits, total_wins = counts.get(move, (0, 0))
+                    counts[move] = (total_visits + visits, total_wins + wins)
+        self.root_counts = counts
+
+        return max(counts, key=lambda m: counts[m]) if counts else None
+
+    # -------------- Tree search --------------
+
+    def _set_root(self, position):
+        """
+        The node to search `position` from: the matching node of the last
+        search's tree, one or two plies down, or a new tree
+        """
+        root = self.root
+        candidates = [root] if root is not None else []
+        for child in root.children if root is not None else ():
+            candidates.append(child)
+            candidates.extend(child.children)
+        for node in candidates:
+            if node.position == position:
+                node.parent = None
+                self.root = node
+                self.tree_nodes = self._count_nodes(node)
+                return node
+        self.root = _Node(position, rng=self.rng)
+        self.tree_nodes = 1
+        return self.root
+
+    @staticmethod
+    def _count_nodes(node) -> int:
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+    def _run(self, root):
+        """Playouts from `root` until the soft time limit, or until aborted while pondering"""
+        try:
+            while True:
+                for _ in range(self.POLL_INTERVAL):
+                    self._iterate(root)
+                self.playouts += self.POLL_INTERVAL
+                self.nodes_visited = self.playouts
+                self._poll()
+                if not self.pondering and self._decided(root):
+                    break
+        except SearchAborted:
+            pass
+
+    def _decided(self, root) -> bool:
+        """True once the time is up, or no other move could catch up with the most visited one in it"""
+        elapsed = self._elapsed()
+        if elapsed >= self.soft_time:
+            return True
+        if len(root.children) < 2 or root.untried:
+            return False
+        first, second = sorted((child.visits for child in root.children), reverse=True)[:2]
+        remaining = self.playouts / elapsed * (self.soft_time - elapsed) if elapsed > 0 else float('inf')
+        return first - second > remaining
+
+    def _iterate(self, root):
+        """One playout: select, expand, simulate, back up"""
+        node = root
+        while node.winner is None and not node.untried and node.children:
+            node = self._select_child(node)
+        if node.winner is None and node.untried and self.tree_nodes < self.max_nodes:
+            move = node.untried.pop()
+            child = _Node(node.position.play(move), move, node, self.rng)
+            node.children.append(child)
+            self.tree_nodes += 1
+            node = child
+
+        winner = node.winner
+        if winner is None:
+            white, black, side, ep_square, _ = node.position
+            winner = self._playout(white, black, side, ep_square)
+
+        while node is not None:
+            node.visits += 1
+            if winner != node.position.side_to_move:
+                node.wins += 1
+            node = node.parent
+
+    def _select_child(self, node):
+        """UCB1, except that a move winning on the spot (expanded first) is always taken"""
+        children = node.children
+        if children[0].winner == node.position.side_to_move:
+            return children[0]
+        log_visits = math.log(node.visits)
+        exploration = self.EXPLORATION
+        best = None
+        best_score = -1.0
+        for child in children:
+            score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def _playout(self, white, black, side, ep_square) -> str:
+        """
+        Finish the game with random moves and return the winner. A push onto
+        the goal row is always played, a capture is preferred with
+        CAPTURE_BIAS, and positions the tablebase covers end the playout.
+        """
+        rng = self.rng
+        tablebase = self.tablebase
+        max_pawns = tablebase.max_pawns if tablebase is not None else 0
+        while True:
+            if popcount(white) <= max_pawns and popcount(black) <= max_pawns:
+                # The probe only reads the bitboards, side and en passant square
+                result = tablebase.probe(Position(white, black, side, ep_square, 0))
+                if result is not None:
+                    return side if result[0] else ('B' if side == 'W' else 'W')
+
+            moves = rules.generate_moves(white, black, ep_square, side)
+            if not moves:
+                return 'B' if side == 'W' else 'W'
+            goal = 0 if side == 'W' else 7
+            captures = []
+            for move in moves:
+                if (move >> 9) & 7 == goal:
+                    return side
+                if move & CAPTURE:
+                    captures.append(move)
+            if captures and rng.random() < self.CAPTURE_BIAS:
+                move = rng.choice(captures)
+            else:
+                move = rng.choice(moves)
+
+            mover = side
+            white, black, side, ep_square, _ = rules.play(white, black, side, ep_square, 0, move)
+            if not (black if mover == 'W' else white):
+                return mover
+
+    @staticmethod
+    def _root_counts(root) -> dict:
+        return {child.move: (child.visits, child.wins) for child in root.children}
+
+    def best_so_far(self) -> Optional[int]:
+        """The most visited move of the running (or last) search so far, or None"""
+        root = self.root
+        if root is None or root.position != self.root_position or not root.children:
+            return None
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _expected_reply(self, board, player: str) -> Optional[int]:
+        """The most visited reply in the tree, if the position is in it (see SearchEngine._expected_reply)"""
+        position = board.to_position()
+        root = self.root
+        for node in [root] + root.children if root is not None else ():
+            if node.position == position and node.children:
+                return max(node.children, key=lambda child: child.visits).move
+        return super()._expected_reply(board, player)
+
+    def principal_variation(self, move: int, max_length: int = 20) -> List[int]:
+        """The most visited line after `move` in the tree"""
+        node = next((child for child in self.root.children if child.move == move), None) if self.root else None
+        line = [move] if move else []
+        while node is not None and node.children and len(line) < max_length:
+            node = max(node.children, key=lambda child: child.visits)
+            line.append(node.move)
+        return line
+
+    def search_report(self, move: Optional[int] = None) -> dict:
+        """
+        Statistics of the last search, as plain data (JSON serialisable):
+        playouts and playouts/sec (helpers included), tree size and reuse,
+        the most visited root moves with their win rates, and the most
+        visited line
+        """
+        elapsed = self.search_time
+        playouts = self.playouts + self.helper_playouts
+        counts = self.root_counts
+        ranked = sorted(counts.items(), key=lambda item: item[1][0], reverse=True)
+        if move is None and ranked:
+            move = ranked[0][0]
+        visits, wins = counts.get(move, (0, 0))
+        return {
+            'player': self.root_position.side_to_move if self.root_position else None,
+            'source': self.result_source,
+            'move': move_to_str(move) if move else None,
+            'score': round(wins / visits, 4) if visits else None,
+            'playouts': playouts,
+            'helper_playouts': self.helper_playouts,
+            'time': round(elapsed, 4),
+            'playouts_per_sec': int(playouts / elapsed) if elapsed > 0 else 0,
+            'soft_time': round(self.soft_time, 3),
+            'hard_time': round(self.hard_time, 3),
+            'remaining_time': round(self.remaining_time, 3),
+            'tree_nodes': self.tree_nodes,
+            'reused_visits': self.reused_visits,
+            'root_moves': [{'move': move_to_str(m), 'visits': v, 'win_rate': round(w / v, 4) if v else None}
+                           for m, (v, w) in ranked[:5]],
+            'pv': [move_to_str(m) for m in self.principal_variation(move)] if move else [],
+        }
+
+    # -------------- Helper processes --------------
+
+    def close(self):
+        """Stop the helper processes; a later search starts them again"""
+        if self._pool is not None:
+            self._pool.close()
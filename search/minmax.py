@@ -1,61 +1,123 @@
 import time
-import copy
-from typing import Tuple, List, Optional
+from typing import List, Optional
+from game.bitboard import ROW_MASKS
+from game.moves import CAPTURE, move_to_str
+from game.zobrist import ZOBRIST_BLACK_ROOT
+from search.engine import SearchEngine, SearchAborted
 from search.evaluation import Evaluation
+from search.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
 
-class Minmax:
-    def __init__(self, total_time_minutes=30):
+
+# A pawn on these rows is at most two moves from its goal row
+_WHITE_RACE_ROWS = ROW_MASKS[1] | ROW_MASKS[2]
+_BLACK_RACE_ROWS = ROW_MASKS[5] | ROW_MASKS[6]
+
+
+class Minmax(SearchEngine):
+    def __init__(self, total_time_minutes=30, tt_size_mb=16, transposition_table=None, tablebase=None):
         """
         Minimax with time-based cutoff, deeper search, and safer fallback checks.
-        Also includes side-to-move in transposition table hashing to prevent stale entries.
+        The transposition table is keyed by the board's Zobrist key, which includes side to move,
+        and is bounded to `tt_size_mb` megabytes. An existing table (e.g. one in
+        shared memory) can be passed in instead.
+        With a search.tablebase.Tablebase, positions it covers are scored
+        exactly instead of searched, at the root and in the tree.
         """
-        self.total_time = total_time_minutes * 60
-        self.remaining_time = self.total_time
-        self.nodes_visited = 0
+        super().__init__(total_time_minutes, tablebase)
+
+        # Time control. No new iteration starts past the soft limit, and the
+        # hard limit is polled every NODE_POLL_INTERVAL nodes. The soft limit
+        # is scaled after every iteration: stretched while the best move keeps
+        # changing, shortened once it has held for STABLE_ITERATIONS iterations.
+        self.UNSTABLE_TIME_SCALE = 1.6
+        self.STABLE_TIME_SCALE = 0.6
+        self.STABLE_ITERATIONS = 3
+        self.BRANCHING_ESTIMATE = 3.0   # Next iteration's cost over the last one's
+        self.NODE_POLL_INTERVAL = 1024
+        self.time_scale = 1.0
+        self.last_iteration_time = 0.0
 
         # Large forced-win values
         self.MAX_SCORE = 1_000_000
         self.MIN_SCORE = -1_000_000
-
-        self.start_time = None
-
-        # If you keep a TT between moves, be cautious about storing "side to move."
-        # The best fix is to store (hash, sideToMove) => (depth, eval).
-        self.transposition_table = {}
+        # Wins closer than this to MAX_SCORE are mate-distance scores (see _win_score)
+        self.WIN_THRESHOLD = self.MAX_SCORE - 1000
+
+        # Zobrist key (includes side to move) => (depth, bound, value, best move).
+        # The table is kept across moves and games. Values are relative to the
+        # root player, so root_key (set per colour) is mixed into every key and
+        # the two colours' entries never meet.
+        if transposition_table is None:
+            transposition_table = TranspositionTable(tt_size_mb)
+        self.transposition_table = transposition_table
+        self.root_key = 0
 
         self.evaluator = Evaluation()
 
         self.max_depth_reached = 0
         self.current_depth = 0
+        self.root_player = None
+
+        # Statistics of the last search (see search_report)
+        self.tt_cutoffs = 0          # Nodes settled by a transposition table entry
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0  # Beta cutoffs on the first move searched
+        self.lmr_reductions = 0      # Moves searched reduced...
+        self.lmr_researches = 0      # ...and searched again at full depth
+        self.futility_prunes = 0
+        self.razor_cuts = 0
+        self.iterations = []         # One record per completed iteration
+        self.iteration_move = None   # Best move of the last completed iteration
+
+        # Quiescence search: extra plies of captures and pushes onto the last two
+        # rows searched past the nominal depth, and the margin for delta pruning
+        self.QUIESCENCE_MAX_DEPTH = 8
+        self.DELTA_MARGIN = 800
 
         self.DEFAULT_MAX_DEPTH = 20  # Deep default
 
-    def get_best_move(self, board, player: str) -> Optional[Tuple[int, int, int, int]]:
-        """
-        Iterative deepening, with time-based cutoff, plus final validity check.
-        """
-        self.start_time = time.time()
-        self.nodes_visited = 0
-
-        estimated_moves_left = self._estimate_remaining_moves(board)
-        time_for_move = max(1.0, self.remaining_time / (estimated_moves_left + 2))
-        allowed_time = time_for_move * 0.85
-
+        # Selective search, each part switchable. Late quiet moves are searched
+        # LMR_REDUCTION plies shallower once LMR_FULL_MOVES moves have been
+        # searched at nodes of LMR_MIN_DEPTH or more, and again at full depth
+        # if they beat the window. At frontier nodes (depth 1), razoring drops
+        # straight into quiescence when the static score is RAZOR_MARGIN below
+        # the window, and futility pruning skips late quiet moves when it is
+        # FUTILITY_MARGIN below. None of them applies in a pawn race (see
+        # _is_race), where one quiet move decides the game.
+        self.use_lmr = True
+        self.use_futility = True
+        self.use_razoring = True
+        self.LMR_MIN_DEPTH = 3
+        self.LMR_FULL_MOVES = 3
+        self.LMR_REDUCTION = 1
+        self.FUTILITY_MARGIN = 300
+        self.RAZOR_MARGIN = 500
+
+        # Move ordering heuristics, updated on beta cutoffs and aged between searches:
+        # two killer moves per ply, and a butterfly history table per colour
+        # indexed by the move's from/to squares (move & 0xFFF)
+        self.MAX_PLY = 64
+        self.killers = [[0, 0] for _ in range(self.MAX_PLY)]
+        self.history = {'W': [0] * 4096, 'B': [0] * 4096}
+
+    def _prepare_search(self, board, player: str):
+        self._prepare_transposition_table(board, player)
+        self._age_heuristics()
+        self._set_root_player(player)
+
+    def _search(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """Iterative deepening over the root moves, each searched with alpha-beta minimax"""
         best_move = None
         best_value = self.MIN_SCORE
+        sorted_moves = self._pre_sort_moves(board, player, moves)
 
-        all_moves = self._get_all_moves(board, player)
-        if not all_moves:
-            return None
-        if len(all_moves) == 1:
-            return all_moves[0]
-
-        sorted_moves = self._pre_sort_moves(board, player, all_moves)
-
+        stable_iterations = 0
         for current_depth in range(1, self.DEFAULT_MAX_DEPTH + 1):
-            if (time.time() - self.start_time) >= allowed_time:
+            if not self._can_start_iteration():
                 break
 
+            iteration_start = time.monotonic()
+            iteration_nodes = self.nodes_visited
             self.current_depth = current_depth
             current_best_move = None
             current_best_value = self.MIN_SCORE
@@ -67,23 +129,35 @@ class Minmax:
                 sorted_moves.remove(best_move)
                 sorted_moves.insert(0, best_move)
 
+            aborted = False
+            root_results = {}  # Move => (score, nodes in its subtree)
             for move in sorted_moves:
-                if (time.time() - self.start_time) >= allowed_time:
+                if self._past_hard_limit():
+                    # Only some root moves searched: this iteration is lost too
+                    aborted = True
                     break
 
-                # Copy board, make move
-                board_copy = self._copy_board(board)
-                self._make_move(board_copy, move, player)
+                # Make move
+                move_nodes = self.nodes_visited
+                undo = self._make_move(board, move, player)
 
                 # Next ply is minimizing
-                value = self._minmax(
-                    board_copy,
-                    depth=current_depth - 1,
-                    maximizing_player=False,
-                    alpha=alpha,
-                    beta=beta,
-                    root_player=player
-                )
+                try:
+                    value = self._minmax(
+                        board,
+                        depth=current_depth - 1,
+                        maximizing_player=False,
+                        alpha=alpha,
+                        beta=beta,
+                        root_player=player,
+                        ply=1
+                    )
+                except SearchAborted:
+                    # The board is left mid-line; this iteration is lost
+                    aborted = True
+                    break
+                self._unmake_move(board, undo)
+                root_results[move] = (value, self.nodes_visited - move_nodes)
 
                 if value > current_best_value:
                     current_best_value = value
@@ -93,183 +167,484 @@ class Minmax:
                 if alpha >= beta:
                     break
 
+            if aborted:
+                break
+
             # Check validity of the new best move
             if current_best_move and self._is_valid_move(board, current_best_move, player):
+                stable_iterations = stable_iterations + 1 if current_best_move == best_move else 0
                 best_move = current_best_move
                 best_value = current_best_value
-                # Possibly break if near forced win
-                if best_value >= self.MAX_SCORE * 0.9:
+                self._record_iteration(current_depth, best_move, best_value,
+                                       self.nodes_visited - iteration_nodes, time.monotonic() - iteration_start)
+                # A forced win or loss found at this depth is exact; deeper won't change it
+                if abs(best_value) >= self.WIN_THRESHOLD:
                     break
 
             self.max_depth_reached = current_depth
+            self._end_iteration(time.monotonic() - iteration_start, stable_iterations)
 
-            # reorder for next iteration
-            if current_depth < self.DEFAULT_MAX_DEPTH:
-                sorted_moves = self._get_sorted_moves(board, player)
-
-        elapsed = time.time() - self.start_time
-        self.remaining_time -= elapsed
-
-        # -------------
-        # Final check
-        # -------------
-        if best_move and not self._is_valid_move(board, best_move, player):
-            # If final best move is invalid, remove from TT and fallback
-            board_hash = self._get_board_hash(board, player)
-            if board_hash in self.transposition_table:
-                del self.transposition_table[board_hash]
-
-            print("[Minmax] WARNING: final chosen move is invalid. Falling back.")
-            # fallback to any valid move
-            for m in all_moves:
-                if self._is_valid_move(board, m, player):
-                    best_move = m
-                    break
-            else:
-                # If truly no valid moves, return None
-                best_move = None
-
+            # Order the next iteration by this one's results (the best move is
+            # put first above): by score, then moves that only failed low by
+            # the size of their subtree. Moves not reached keep their place at the end.
+            sorted_moves.sort(key=lambda m: root_results.get(m, (self.MIN_SCORE, -1)), reverse=True)
 
         return best_move
 
-    def _minmax(self, board, depth: int, maximizing_player: bool, alpha: float, beta: float, root_player: str) -> float:
+    def _minmax(self, board, depth: int, maximizing_player: bool, alpha: float, beta: float, root_player: str,
+                ply: int) -> float:
         self.nodes_visited += 1
-        board_hash = self._get_board_hash(board, root_player if maximizing_player else ('B' if root_player=='W' else 'W'))
-        # Check transposition table
-        if board_hash in self.transposition_table:
-            stored_depth, stored_value = self.transposition_table[board_hash]
-            if stored_depth >= depth:
+        if not self.nodes_visited % self.NODE_POLL_INTERVAL:
+            self._poll()
+        board_hash = self._get_board_hash(board)
+        # Check transposition table; bounds only settle the node if they fall outside the window
+        entry = self.transposition_table.probe(board_hash)
+        tt_move = 0
+        if entry is not None:
+            stored_depth, bound, stored_value, tt_move = entry
+            stored_value = self._value_from_tt(stored_value, ply)
+            if stored_depth >= depth and (bound == EXACT or (
+                    stored_value >= beta if bound == LOWER_BOUND else stored_value <= alpha)):
+                self.tt_cutoffs += 1
                 return stored_value
 
-        # depth or terminal check
-        if self._is_terminal(board):
-            val = self._evaluate_terminal(board, root_player)
-            return val
+        # depth or terminal check; the quickest win and the slowest loss score best
+        winner = board.terminal_status()
+        if winner is not None:
+            return self._win_score(ply) if winner == root_player else -self._win_score(ply)
+        if self.tablebase is not None:
+            value = self._probe_tablebase(board, ply)
+            if value is not None:
+                return value if board.side_to_move == root_player else -value
         if depth == 0:
-            return self._evaluate(board, root_player)
+            # Resolve captures and promotion threats before trusting the evaluation
+            if board.side_to_move == root_player:
+                return self._quiescence(board, alpha, beta, ply, 0)
+            return -self._quiescence(board, -beta, -alpha, ply, 0)
+
+        race = self._is_race(board)
+        prune_quiet = False
+        if depth == 1 and not race and (self.use_razoring or self.use_futility):
+            # Frontier node: the window's lower end as seen by the side to move
+            low = alpha if maximizing_player else -beta
+            if abs(low) < self.WIN_THRESHOLD:
+                static = self._evaluate_side_to_move(board)
+                if self.use_razoring and static + self.RAZOR_MARGIN <= low:
+                    # Hopeless unless a capture or a push saves it: trust quiescence if it agrees
+                    value = self._quiescence(board, low, low + 1, ply, 0)
+                    if value <= low:
+                        self.razor_cuts += 1
+                        return value if maximizing_player else -value
+                prune_quiet = self.use_futility and static + self.FUTILITY_MARGIN <= low
+        reduce_late = self.use_lmr and depth >= self.LMR_MIN_DEPTH and not race
 
         # Determine the current side to move
         current_player = root_player if maximizing_player else ('B' if root_player=='W' else 'W')
         moves = self._get_all_moves(board, current_player)
         if not moves:
-            return self.MIN_SCORE if maximizing_player else self.MAX_SCORE
+            return -self._win_score(ply) if maximizing_player else self._win_score(ply)
 
-        moves = self._pre_sort_moves(board, current_player, moves)
+        moves = self._order_moves(current_player, moves, ply, tt_move)
 
+        alpha_orig = alpha
+        beta_orig = beta
+        best_move = 0
         if maximizing_player:
             value = self.MIN_SCORE
-            for move in moves:
-                board_copy = self._copy_board(board)
-                self._make_move(board_copy, move, current_player)
-                val = self._minmax(board_copy, depth-1, False, alpha, beta, root_player)
-                value = max(value, val)
+            for index, move in enumerate(moves):
+                late_quiet = index > 0 and self._is_quiet(move, current_player, ply)
+                if late_quiet and prune_quiet:
+                    self.futility_prunes += 1
+                    continue
+                undo = self._make_move(board, move, current_player)
+                if late_quiet and reduce_late and index >= self.LMR_FULL_MOVES:
+                    self.lmr_reductions += 1
+                    val = self._minmax(board, depth-1-self.LMR_REDUCTION, False, alpha, beta, root_player, ply+1)
+                    if val > alpha:
+                        self.lmr_researches += 1
+                        val = self._minmax(board, depth-1, False, alpha, beta, root_player, ply+1)
+                else:
+                    val = self._minmax(board, depth-1, False, alpha, beta, root_player, ply+1)
+                self._unmake_move(board, undo)
+                if val > value or not best_move:
+                    value = val
+                    best_move = move
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    self._record_cutoff(move, current_player, ply, depth, index == 0)
                     break
-
-            self.transposition_table[board_hash] = (depth, value)
-            return value
         else:
             value = self.MAX_SCORE
-            for move in moves:
-                board_copy = self._copy_board(board)
-                self._make_move(board_copy, move, current_player)
-                val = self._minmax(board_copy, depth-1, True, alpha, beta, root_player)
-                value = min(value, val)
+            for index, move in enumerate(moves):
+                late_quiet = index > 0 and self._is_quiet(move, current_player, ply)
+                if late_quiet and prune_quiet:
+                    self.futility_prunes += 1
+                    continue
+                undo = self._make_move(board, move, current_player)
+                if late_quiet and reduce_late and index >= self.LMR_FULL_MOVES:
+                    self.lmr_reductions += 1
+                    val = self._minmax(board, depth-1-self.LMR_REDUCTION, True, alpha, beta, root_player, ply+1)
+                    if val < beta:
+                        self.lmr_researches += 1
+                        val = self._minmax(board, depth-1, True, alpha, beta, root_player, ply+1)
+                else:
+                    val = self._minmax(board, depth-1, True, alpha, beta, root_player, ply+1)
+                self._unmake_move(board, undo)
+                if val < value or not best_move:
+                    value = val
+                    best_move = move
                 beta = min(beta, value)
                 if alpha >= beta:
+                    self._record_cutoff(move, current_player, ply, depth, index == 0)
                     break
 
-            self.transposition_table[board_hash] = (depth, value)
-            return value
+        self._store(board_hash, depth, ply, value, alpha_orig, beta_orig, best_move, board.progress())
+        return value
+
+    def _quiescence(self, board, alpha: float, beta: float, ply: int, qdepth: int) -> float:
+        """
+        Quiescence search past the horizon, scored for the side to move.
+        Only captures (including en passant) and pushes onto the last two rows
+        are searched. The side to move may also stand pat on the static
+        evaluation, and captures that could not lift the score to alpha even
+        with DELTA_MARGIN added are pruned.
+        """
+        self.nodes_visited += 1
+        if not self.nodes_visited % self.NODE_POLL_INTERVAL:
+            self._poll()
+        winner = board.terminal_status()
+        if winner is not None:
+            return self._win_score(ply) if winner == board.side_to_move else -self._win_score(ply)
+        if self.tablebase is not None:
+            value = self._probe_tablebase(board, ply)
+            if value is not None:
+                return value
+
+        stand_pat = self._evaluate_side_to_move(board)
+        if stand_pat >= beta or qdepth >= self.QUIESCENCE_MAX_DEPTH:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        player = board.side_to_move
+        moves = board.generate_tactical_moves(player)
+        if not moves:
+            return stand_pat
+
+        # Pushes onto the last two rows are never delta-pruned: they threaten to win
+        threat_rows = (0, 1) if player == 'W' else (6, 7)
+        prune_captures = stand_pat + self.DELTA_MARGIN <= alpha
+        best_value = stand_pat
+        for move in self._order_moves(player, moves, ply):
+            if prune_captures and (move >> 9) & 7 not in threat_rows:
+                continue
+            undo = self._make_move(board, move, player)
+            value = -self._quiescence(board, -beta, -alpha, ply + 1, qdepth + 1)
+            self._unmake_move(board, undo)
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        return best_value
+
+    # -------------- Statistics --------------
+
+    def _reset_search_stats(self, board, player: str):
+        # Stays 0 when the move comes without a search (single reply, tablebase)
+        self.max_depth_reached = 0
+        self.tt_cutoffs = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.lmr_reductions = 0
+        self.lmr_researches = 0
+        self.futility_prunes = 0
+        self.razor_cuts = 0
+        self.iterations = []
+        self.iteration_move = None
+        super()._reset_search_stats(board, player)
+
+    def _record_iteration(self, depth: int, move: int, value: float, nodes: int, elapsed: float):
+        self.iteration_move = move
+        self.iterations.append({
+            'depth': depth,
+            'move': move_to_str(move),
+            'score': value,
+            'nodes': nodes,
+            'time': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+        })
+
+    def best_so_far(self) -> Optional[int]:
+        """Best move of the deepest iteration the running (or last) search has completed, or None"""
+        return self.iteration_move
+
+    def principal_variation(self, move: int, max_length: int = 20) -> List[int]:
+        """
+        Expected line after `move` from the last search's root, following the
+        best moves stored in the transposition table
+        """
+        line = []
+        seen = set()
+        position = self.root_position
+        while move and len(line) < max_length and move in position.generate_moves():
+            line.append(move)
+            position = position.play(move)
+            if position.key in seen or position.terminal_status() is not None:
+                break
+            seen.add(position.key)
+            entry = self.transposition_table.probe(position.key ^ self.root_key)
+            move = entry[3] if entry is not None else 0
+        return line
+
+    def search_report(self, move: Optional[int] = None) -> dict:
+        """
+        Statistics of the last search, as plain data (JSON serialisable):
+        totals, TT use, cutoff rates, effective branching factor, one record
+        per completed iteration and the principal variation starting with
+        `move` (by default the last iteration's move).
+        """
+        if move is None:
+            move = self.iteration_move
+        elapsed = self.search_time
+
+        # Effective branching factor: node growth between the last two iterations
+        ebf = None
+        counts = [record['nodes'] for record in self.iterations]
+        if len(counts) >= 2 and counts[-2]:
+            ebf = round(counts[-1] / counts[-2], 2)
+
+        return {
+            'player': self.root_player,
+            'source': self.result_source,
+            'move': move_to_str(move) if move else None,
+            'score': self.iterations[-1]['score'] if self.iterations else None,
+            'depth': self.max_depth_reached,
+            'nodes': self.nodes_visited,
+            'time': round(elapsed, 4),
+            'nps': int(self.nodes_visited / elapsed) if elapsed > 0 else 0,
+            'soft_time': round(self.soft_time, 3),
+            'hard_time': round(self.hard_time, 3),
+            'remaining_time': round(self.remaining_time, 3),
+            'tt': self.transposition_table.stats(),
+            'tt_cutoffs': self.tt_cutoffs,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoff_rate': round(self.first_move_cutoffs / self.beta_cutoffs, 4)
+                                      if self.beta_cutoffs else None,
+            'ebf': ebf,
+            'lmr_reductions': self.lmr_reductions,
+            'lmr_researches': self.lmr_researches,
+            'futility_prunes': self.futility_prunes,
+            'razor_cuts': self.razor_cuts,
+            'iterations': self.iterations,
+            'pv': [move_to_str(m) for m in self.principal_variation(move)] if move else [],
+        }
+
+    # -------------- Tablebase --------------
+
+    def _probe_tablebase(self, board, ply: int) -> Optional[float]:
+        """Exact score for the side to move if the tablebase has the position, else None"""
+        result = self.tablebase.probe(board)
+        if result is None:
+            return None
+        win, distance = result
+        score = self._win_score(ply + distance)
+        return score if win else -score
+
+    # -------------- Transposition table --------------
+
+    def _prepare_transposition_table(self, board, player: str):
+        """
+        Start a new search generation from `board`. Entries from earlier moves
+        and games stay; the ones this root can no longer reach become free slots.
+        """
+        table = self.transposition_table
+        table.new_search(board.progress())
+        table.reset_stats()
+
+    def _set_root_player(self, player: str):
+        """Search for `player`: evaluations and table keys are taken for this colour"""
+        self.root_player = player
+        self.root_key = ZOBRIST_BLACK_ROOT if player == 'B' else 0
+
+    def _store(self, board_hash: int, depth: int, ply: int, value: float, alpha: float, beta: float,
+               best_move: int, progress: int):
+        """
+        Save `value` with the bound type it has relative to the (alpha, beta)
+        window it was searched with, win scores relative to this node
+        """
+        if value <= alpha:
+            bound = UPPER_BOUND
+        elif value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(board_hash, depth, bound, self._value_to_tt(value, ply), best_move, progress)
 
     # -------------- Evaluation helpers --------------
 
     def _evaluate(self, board, player: str) -> float:
         return self.evaluator.evaluate(board, player)
 
-    def _evaluate_terminal(self, board, player: str) -> float:
-        if board.check_win(player):
-            return self.MAX_SCORE
-        elif board.check_win('B' if player=='W' else 'W'):
-            return self.MIN_SCORE
-        return 0
+    def _evaluate_side_to_move(self, board) -> float:
+        """
+        Static score for the side to move. The evaluation is not symmetric
+        between the colours, so it is always taken for the root player and
+        negated at the opponent's nodes.
+        """
+        value = self._evaluate(board, self.root_player)
+        return value if board.side_to_move == self.root_player else -value
+
+    # -------------- Time control --------------
+
+    def _start_clock(self, board):
+        super()._start_clock(board)
+        self.time_scale = 1.0
+        self.last_iteration_time = 0.0
 
-    def _is_terminal(self, board) -> bool:
-        return board.check_win('W') or board.check_win('B')
+    def _can_start_iteration(self) -> bool:
+        """
+        True if there is time for another iteration: the scaled soft limit
+        isn't reached and the iteration would likely end before the hard one
+        """
+        if self.pondering:
+            return True
+        elapsed = self._elapsed()
+        return (elapsed < self.soft_time * self.time_scale
+                and elapsed + self.last_iteration_time * self.BRANCHING_ESTIMATE < self.hard_time)
+
+    def _end_iteration(self, iteration_time: float, stable_iterations: int):
+        """
+        Scale the soft limit after a completed iteration: a best move that
+        just changed gets more time, one that has held for a while gets less
+        """
+        self.last_iteration_time = iteration_time
+        if stable_iterations == 0:
+            self.time_scale = self.UNSTABLE_TIME_SCALE
+        elif stable_iterations >= self.STABLE_ITERATIONS:
+            self.time_scale = self.STABLE_TIME_SCALE
+        else:
+            self.time_scale = 1.0
+
+    def _win_score(self, ply: int) -> float:
+        """Wins are worth less the further they are from the root, so the quickest one is preferred"""
+        return self.MAX_SCORE - ply
+
+    def _value_to_tt(self, value: float, ply: int) -> float:
+        """Store win scores as distance from this node rather than from the root"""
+        if value >= self.WIN_THRESHOLD:
+            return value + ply
+        if value <= -self.WIN_THRESHOLD:
+            return value - ply
+        return value
+
+    def _value_from_tt(self, value: float, ply: int) -> float:
+        if value >= self.WIN_THRESHOLD:
+            return value - ply
+        if value <= -self.WIN_THRESHOLD:
+            return value + ply
+        return value
 
     # -------------- Move generation / ordering --------------
 
-    def _pre_sort_moves(self, board, player: str, moves: List[Tuple[int,int,int,int]]) -> List[Tuple[int,int,int,int]]:
+    def _expected_reply(self, board, player: str) -> Optional[int]:
+        """
+        The move `player` most likely plays on `board` (for pondering): the
+        transposition table's best move, else the first by static ordering.
+        None if there is no move.
+        """
+        entry = self.transposition_table.probe(self._get_board_hash(board))
+        if entry is not None and entry[3] in self._get_all_moves(board, player):
+            return entry[3]
+        return super()._expected_reply(board, player)
+
+    def _is_race(self, board) -> bool:
+        """True if a pawn of either side is at most two moves from its goal row"""
+        return bool(board.white & _WHITE_RACE_ROWS or board.black & _BLACK_RACE_ROWS)
+
+    def _is_quiet(self, move: int, player: str, ply: int) -> bool:
+        """
+        True for a move the selective search may reduce or prune: not a
+        capture, not a push onto the last two rows and not a killer
+        """
+        if move & CAPTURE or (move >> 9) & 7 in ((0, 1) if player == 'W' else (6, 7)):
+            return False
+        return ply >= self.MAX_PLY or move not in self.killers[ply]
+
+    def _order_moves(self, player: str, moves: List[int], ply: int, tt_move: int = 0) -> List[int]:
+        """
+        Order moves for an interior node: the TT move, winning pushes to the
+        goal row, captures, the two killers of this ply, then quiet moves by
+        history score (static advancement breaks ties).
+        """
+        history = self.history[player]
+        if ply < self.MAX_PLY:
+            killer1, killer2 = self.killers[ply]
+        else:
+            killer1 = killer2 = 0
+        goal_row = 0 if player == 'W' else 7
+
         scored = []
-        for (fr,fc,tr,tc) in moves:
-            sc = 0
-            # Bonus for captures
-            if board.boardArray[tr][tc] != ' ':
-                sc += 50
-            # Encourage promotion
-            if player=='W':
-                sc += (7 - tr)
-                if tr==0: sc += 100
+        for m in moves:
+            tr = (m >> 9) & 7
+            sc = (7 - tr) if player == 'W' else tr
+            if m == tt_move:
+                sc += 1 << 40
+            elif tr == goal_row:
+                sc += 1 << 39
+            elif m & CAPTURE:
+                sc += 1 << 38
+            elif m == killer1:
+                sc += 1 << 37
+            elif m == killer2:
+                sc += 1 << 36
             else:
-                sc += tr
-                if tr==7: sc += 100
-
-            scored.append(((fr,fc,tr,tc), sc))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [mv for mv,_ in scored]
-
-    def _get_sorted_moves(self, board, player: str) -> List[Tuple[int,int,int,int]]:
-        mv_list = self._get_all_moves(board, player)
-        if not mv_list:
-            return []
-        out = []
-        for m in mv_list:
-            (fr,fc,tr,tc) = m
-            copy_b = self._copy_board(board)
-            self._make_move(copy_b, m, player)
-            sc = self._evaluate(copy_b, player)
-            if copy_b.check_win(player):
-                sc = self.MAX_SCORE
-            out.append((m, sc))
-        out.sort(key=lambda x: x[1], reverse=True)
-        return [m for m,_ in out]
+                sc += history[m & 0xFFF] << 4
+            scored.append((sc, m))
+        scored.sort(reverse=True)
+        return [m for _, m in scored]
 
-    # -------------- Board / Move helpers --------------
-
-    def _get_board_hash(self, board, side_to_move:str) -> str:
+    def _record_cutoff(self, move: int, player: str, ply: int, depth: int, first_move: bool):
+        """
+        A move caused a beta cutoff: count it, and if it is a quiet move make
+        it a killer and raise its history score
+        """
+        self.beta_cutoffs += 1
+        if first_move:
+            self.first_move_cutoffs += 1
+        if move & CAPTURE:
+            return
+        if ply < self.MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[player][move & 0xFFF] += depth * depth
+
+    def _age_heuristics(self):
         """
-        Combine board layout + side to move for TT key.
+        Between searches: the root moves two plies down the game, so shift the
+        killers by two plies, and halve the history so old cutoffs fade out.
         """
-        layout_str = ''.join(''.join(cell if cell!=' ' else '-' for cell in row) for row in board.boardArray)
-        return side_to_move + ":" + layout_str
+        self.killers = self.killers[2:] + [[0, 0], [0, 0]]
+        for table in self.history.values():
+            for i, value in enumerate(table):
+                if value:
+                    table[i] = value >> 1
 
-    def _estimate_remaining_moves(self, board) -> int:
-        # same logic as before
-        white_pawns = sum(row.count('W') for row in board.boardArray)
-        black_pawns = sum(row.count('B') for row in board.boardArray)
-        total_pawns = white_pawns + black_pawns
-        return max(6, total_pawns * 2)
+    # -------------- Board / Move helpers --------------
 
-    def _copy_board(self, board):
-        return board.copy()
+    def _get_board_hash(self, board) -> int:
+        """
+        TT key: the board's incrementally maintained Zobrist key, which already
+        covers pawn layout, side to move and en passant file, salted with the
+        root player's key.
+        """
+        return board.zobrist_key ^ self.root_key
 
-    def _make_move(self, board, move: tuple, player: str):
-        board.computeMove(move, player)
+    def _make_move(self, board, move: int, player: str) -> tuple:
+        return board.make_move(move, player)
 
-    def _is_valid_move(self, board, move: tuple, player: str) -> bool:
-        fr, fc, tr, tc = move
-        if board.boardArray[fr][fc] != player:
-            return False
-        valid = board.get_valid_moves(fr, fc)
-        return (tr, tc) in valid
-
-    def _get_all_moves(self, board, player: str) -> List[Tuple[int,int,int,int]]:
-        out = []
-        for r in range(8):
-            for c in range(8):
-                if board.boardArray[r][c] == player:
-                    for (tr,tc) in board.get_valid_moves(r, c):
-                        out.append((r,c,tr,tc))
-        return out
+    def _unmake_move(self, board, undo: tuple):
+        board.unmake_move(undo)
@@ -0,0 +1,235 @@
+import time
+from typing import List, Optional
+from search.minmax import Minmax, SearchAborted
+from search.transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+
+class Negamax(Minmax):
+    def __init__(self, total_time_minutes=30, tt_size_mb=16, transposition_table=None, tablebase=None):
+        """
+        Negamax with principal variation search and aspiration windows.
+
+        Scores are always from the point of view of the side to move. The first
+        move at each node is searched with the full window and the rest with a
+        null window, re-searching only the ones that fail high. From depth
+        ASPIRATION_MIN_DEPTH on, each iteration starts from a narrow window
+        around the previous iteration's score and widens it on failure.
+
+        Time budget, move generation, ordering and evaluation are shared with
+        Minmax, and so is the transposition table: null-window results are
+        stored as bounds and the best move is tried first on the next visit.
+        """
+        super().__init__(total_time_minutes, tt_size_mb, transposition_table, tablebase)
+
+        self.ASPIRATION_WINDOW = 50     # Half-width of the first window
+        self.ASPIRATION_MIN_DEPTH = 3   # Shallower iterations use the full window
+        self.ASPIRATION_GROWTH = 4      # Window widening factor after a failure
+
+    def _search(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """Iterative deepening with aspiration windows over the statically ordered root moves"""
+        root_moves = self._pre_sort_moves(board, player, moves)
+        best_move, _ = self._iterative_deepening(board, root_moves)
+        return best_move
+
+    def _iterative_deepening(self, board, root_moves: List[int], start_depth: int = 1, on_iteration=None):
+        """
+        Deepen one ply at a time from `start_depth` until the time is up (see
+        _can_start_iteration and the hard limit) or the result is a forced win
+        or loss. `root_moves` is reordered in place (best move first). After
+        each completed iteration on_iteration(depth, move, value) is called if given.
+
+        :return: (best move, its value) of the deepest completed iteration;
+                 (None, None) if none completed
+        """
+        best_move = None
+        best_value = None
+        self.max_depth_reached = 0
+        stable_iterations = 0
+
+        for current_depth in range(start_depth, self.DEFAULT_MAX_DEPTH + 1):
+            if not self._can_start_iteration():
+                break
+            iteration_start = time.monotonic()
+            iteration_nodes = self.nodes_visited
+            self.current_depth = current_depth
+
+            # Aspiration window around the previous iteration's score
+            if current_depth >= self.ASPIRATION_MIN_DEPTH and best_value is not None \
+                    and abs(best_value) < self.WIN_THRESHOLD:
+                delta = self.ASPIRATION_WINDOW
+                alpha = best_value - delta
+                beta = best_value + delta
+            else:
+                delta = None
+                alpha = self.MIN_SCORE
+                beta = self.MAX_SCORE
+
+            while True:
+                value, move, complete = self._search_root(board, root_moves, current_depth, alpha, beta)
+                if not complete or delta is None:
+                    break
+                # Widen the side that failed and search this depth again
+                if value <= alpha:
+                    delta *= self.ASPIRATION_GROWTH
+                    alpha = max(self.MIN_SCORE, value - delta)
+                elif value >= beta:
+                    delta *= self.ASPIRATION_GROWTH
+                    beta = min(self.MAX_SCORE, value + delta)
+                else:
+                    break
+                if alpha == self.MIN_SCORE and beta == self.MAX_SCORE:
+                    delta = None
+
+            if not complete:
+                # Only some root moves searched: keep the last completed iteration's move
+                break
+            stable_iterations = stable_iterations + 1 if move == best_move else 0
+            best_move = move
+            best_value = value
+
+            self.max_depth_reached = current_depth
+            iteration_time = time.monotonic() - iteration_start
+            self._record_iteration(current_depth, best_move, best_value,
+                                   self.nodes_visited - iteration_nodes, iteration_time)
+            self._end_iteration(iteration_time, stable_iterations)
+            if on_iteration is not None:
+                on_iteration(current_depth, best_move, best_value)
+
+            # Previous best move first at the next depth
+            root_moves.remove(best_move)
+            root_moves.insert(0, best_move)
+
+            # A forced win or loss found at this depth is exact; deeper won't change it
+            if abs(best_value) >= self.WIN_THRESHOLD:
+                break
+
+        return best_move, best_value
+
+    def _search_root(self, board, moves: List[int], depth: int, alpha: float, beta: float):
+        """
+        One root iteration inside (alpha, beta).
+
+        :return: (best score, best move, complete) where complete is False if
+                 the hard time limit passed or the search was aborted before
+                 every root move was searched. After an abort the board is left
+                 mid-line and must not be searched again.
+        """
+        player = board.side_to_move
+        best_value = self.MIN_SCORE - 1
+        best_move = None
+
+        for index, move in enumerate(moves):
+            if self._past_hard_limit():
+                return best_value, best_move, False
+
+            undo = self._make_move(board, move, player)
+            try:
+                if index == 0:
+                    value = -self._pvs(board, depth - 1, -beta, -alpha, 1)
+                else:
+                    value = -self._pvs(board, depth - 1, -alpha - 1, -alpha, 1)
+                    if alpha < value < beta:
+                        value = -self._pvs(board, depth - 1, -beta, -alpha, 1)
+            except SearchAborted:
+                return best_value, best_move, False
+            self._unmake_move(board, undo)
+
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        return best_value, best_move, True
+
+    def _pvs(self, board, depth: int, alpha: float, beta: float, ply: int) -> float:
+        """Principal variation search; the score is from the side to move's point of view"""
+        self.nodes_visited += 1
+        if not self.nodes_visited % self.NODE_POLL_INTERVAL:
+            self._poll()
+
+        winner = board.terminal_status()
+        if winner is not None:
+            # Prefer the quickest win and the slowest loss
+            return self._win_score(ply) if winner == board.side_to_move else -self._win_score(ply)
+        if self.tablebase is not None:
+            value = self._probe_tablebase(board, ply)
+            if value is not None:
+                return value
+
+        board_hash = self._get_board_hash(board)
+        entry = self.transposition_table.probe(board_hash)
+        tt_move = 0
+        if entry is not None:
+            stored_depth, bound, stored_value, tt_move = entry
+            if stored_depth >= depth:
+                stored_value = self._value_from_tt(stored_value, ply)
+                if bound == EXACT or (stored_value >= beta if bound == LOWER_BOUND else stored_value <= alpha):
+                    self.tt_cutoffs += 1
+                    return stored_value
+
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply, 0)
+
+        # Selective search (see Minmax.__init__)
+        race = self._is_race(board)
+        prune_quiet = False
+        if depth == 1 and not race and (self.use_razoring or self.use_futility) and abs(alpha) < self.WIN_THRESHOLD:
+            static = self._evaluate_side_to_move(board)
+            if self.use_razoring and static + self.RAZOR_MARGIN <= alpha:
+                value = self._quiescence(board, alpha, alpha + 1, ply, 0)
+                if value <= alpha:
+                    self.razor_cuts += 1
+                    return value
+            prune_quiet = self.use_futility and static + self.FUTILITY_MARGIN <= alpha
+        reduce_late = self.use_lmr and depth >= self.LMR_MIN_DEPTH and not race
+
+        player = board.side_to_move
+        moves = self._order_moves(player, self._get_all_moves(board, player), ply, tt_move)
+
+        alpha_orig = alpha
+        best_value = self.MIN_SCORE - 1
+        best_move = None
+        for index, move in enumerate(moves):
+            late_quiet = index > 0 and self._is_quiet(move, player, ply)
+            if late_quiet and prune_quiet:
+                self.futility_prunes += 1
+                continue
+            undo = self._make_move(board, move, player)
+            if index == 0:
+                value = -self._pvs(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Scout with a null window, reduced for late quiet moves;
+                # re-search only if it beats alpha
+                if late_quiet and reduce_late and index >= self.LMR_FULL_MOVES:
+                    self.lmr_reductions += 1
+                    value = -self._pvs(board, depth - 1 - self.LMR_REDUCTION, -alpha - 1, -alpha, ply + 1)
+                    if value > alpha:
+                        self.lmr_researches += 1
+                        value = -self._pvs(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                else:
+                    value = -self._pvs(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < value < beta:
+                    value = -self._pvs(board, depth - 1, -beta, -alpha, ply + 1)
+            self._unmake_move(board, undo)
+
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self._record_cutoff(move, player, ply, depth, index == 0)
+                        break
+
+        if best_value <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(board_hash, depth, bound, self._value_to_tt(best_value, ply), best_move,
+                                       board.progress())
+        return best_value
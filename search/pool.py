@@ -0,0 +1,123 @@
+"""
+Helper processes for the parallel engines (search.smp, search.mcts).
+
+The main process owns a HelperPool: it starts workers - 1 helper processes on
+the first search and keeps them alive between moves. Each search is handed
+to every helper as a job tagged with a new search id; the id is also
+published in a shared value, which the helpers poll so they drop a search as
+soon as the main process has moved on. Helpers put their reports, starting
+with the search id, on one shared results queue.
+
+In a helper process, run_helper() waits for jobs and passes each one to the
+engine's handler, which reports through the results queue.
+"""
+
+import multiprocessing
+import queue
+import time
+
+from search.tablebase import Tablebase
+
+
+def open_tablebase(path):
+    """The tablebase at `path` (None for no tablebase), opened in a helper process"""
+    # Each process maps the tablebase file itself; the pages are shared by the OS
+    return Tablebase(path) if path else None
+
+
+def run_helper(jobs, active_search, handle_job):
+    """
+    Helper process loop: wait for a job and pass it to handle_job(search_id, *data),
+    skipping jobs of searches the main process has already ended.
+    Jobs are (search_id, *data); None stops the helper.
+    """
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            if active_search.value != job[0]:
+                continue  # Stale job, the main process has already moved on
+            handle_job(*job)
+    except KeyboardInterrupt:
+        pass
+
+
+class HelperPool:
+    def __init__(self, target, workers, args=()):
+        """
+        :param target: Module-level helper function, called in each process as
+                       target(worker_id, *args, jobs, results, active_search)
+        :param workers: Processes in total, this one included
+        :param args: Picklable arguments passed on to every helper
+        """
+        self.target = target
+        self.workers = max(1, workers)
+        self.args = tuple(args)
+
+        self._context = multiprocessing.get_context()
+        self._processes = []
+        self._jobs = []
+        self.results = self._context.Queue()
+        self.active_search = self._context.RawValue('i', 0)
+        self.search_id = 0
+
+    def start(self):
+        """Start the helper processes if they aren't running"""
+        if self._processes:
+            return
+        for worker_id in range(1, self.workers):
+            jobs = self._context.Queue()
+            process = self._context.Process(
+                target=self.target,
+                args=(worker_id, *self.args, jobs, self.results, self.active_search),
+                daemon=True)
+            process.start()
+            self._jobs.append(jobs)
+            self._processes.append(process)
+
+    def begin_search(self, *data):
+        """Hand a new search to every helper as the job (search_id, *data)"""
+        self.start()
+        self.drain()
+        self.search_id += 1
+        self.active_search.value = self.search_id
+        job = (self.search_id, *data)
+        for jobs in self._jobs:
+            jobs.put(job)
+
+    def end_search(self, wait=0.0, expected=None):
+        """
+        Tell the helpers the search is over and collect their reports on it
+        (see drain), without the leading search id
+        """
+        self.active_search.value = 0
+        return [report[1:] for report in self.drain(wait, expected) if report[0] == self.search_id]
+
+    def drain(self, wait=0.0, expected=None):
+        """
+        Helper reports in the queue, waiting up to `wait` seconds for ones
+        still in flight (or until `expected` reports have come in)
+        """
+        reports = []
+        deadline = time.monotonic() + wait
+        while expected is None or len(reports) < expected:
+            try:
+                reports.append(self.results.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return reports
+
+    def close(self):
+        """Stop the helper processes; start() or a later search starts them again"""
+        if not self._processes:
+            return
+        self.active_search.value = 0
+        for jobs in self._jobs:
+            jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._jobs = []
@@ -0,0 +1,132 @@
+"""
+Lazy SMP: parallel search over several processes.
+
+Every process runs the ordinary Negamax iterative deepening from the same
+root. They only cooperate through one transposition table in shared memory,
+so the helpers fill it with results the main search then finds for free.
+Helpers are given different starting depths and root move orders so they do
+not all walk the same tree in lockstep. The deepest completed iteration of
+any process decides the move.
+"""
+
+import atexit
+import random
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+from search.negamax import Negamax
+from search.pool import HelperPool, open_tablebase, run_helper
+from search.transposition import TranspositionTable, ENTRY_BYTES, slots_for_size
+
+
+def _helper_main(worker_id, shm_name, tt_size_mb, tablebase_path, jobs, results, active_search):
+    """
+    Helper process (see search.pool): search each job until the main process
+    moves on to another search, reporting every completed iteration.
+    Jobs are (search_id, position, generation, hard_time).
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    table = TranspositionTable(tt_size_mb, buffer=shm.buf)
+    engine = Negamax(tt_size_mb=tt_size_mb, transposition_table=table, tablebase=open_tablebase(tablebase_path))
+    rng = random.Random(worker_id)
+
+    def search(search_id, position, generation, hard_time):
+        player = position.side_to_move
+        board = position.to_board()
+        table.generation = generation
+        table.min_progress = position.progress()
+        engine._set_root_player(player)
+        # No soft limit: the helper deepens until the main search is done
+        engine.start_time = time.monotonic()
+        engine.soft_time = engine.hard_time = hard_time
+        engine.time_scale = 1.0
+        engine.last_iteration_time = 0.0
+        engine.nodes_visited = 0
+        engine._age_heuristics()
+        engine.abort_check = lambda: active_search.value != search_id
+
+        # Keep the main process's first move, shuffle the rest, and let
+        # every other helper start one ply deeper
+        root_moves = engine._pre_sort_moves(board, player, board.generate_moves(player))
+        tail = root_moves[1:]
+        rng.shuffle(tail)
+        root_moves[1:] = tail
+
+        def report(depth, move, value):
+            results.put((search_id, worker_id, depth, move, value, engine.nodes_visited))
+
+        engine._iterative_deepening(board, root_moves, start_depth=1 + worker_id % 2, on_iteration=report)
+
+    try:
+        run_helper(jobs, active_search, search)
+    finally:
+        table.release()
+        shm.close()
+
+
+class LazySMP(Negamax):
+    def __init__(self, total_time_minutes=30, tt_size_mb=16, workers=2, tablebase=None):
+        """
+        Negamax that searches with `workers` processes in total: this one and
+        workers - 1 helpers, started on the first search and kept alive until
+        close(). The transposition table lives in shared memory.
+        """
+        self._shm = shared_memory.SharedMemory(create=True, size=slots_for_size(tt_size_mb) * ENTRY_BYTES)
+        super().__init__(total_time_minutes, tt_size_mb,
+                         TranspositionTable(tt_size_mb, buffer=self._shm.buf), tablebase)
+        self.tt_size_mb = tt_size_mb
+        self.workers = max(1, workers)
+        self._pool = HelperPool(_helper_main, self.workers,
+                                (self._shm.name, tt_size_mb, self.tablebase.path if self.tablebase else None))
+
+        # Nodes the helpers reported for the last search, and whose result was used
+        self.helper_nodes = 0
+        self.result_source = 'main'
+        atexit.register(self.close)
+
+    def _prepare_search(self, board, player: str):
+        super()._prepare_search(board, player)
+        self.helper_nodes = 0
+
+    def _search(self, board, player: str, moves: List[int]) -> Optional[int]:
+        """Iterative deepening here and in every helper; the deepest completed iteration wins"""
+        # Hand the root to the helpers, then search it here as well.
+        # While pondering the helpers run until this search ends, whenever that is
+        helper_time = float('inf') if self.pondering else self.hard_time
+        self._pool.begin_search(board.to_position(), self.transposition_table.generation, helper_time)
+
+        root_moves = self._pre_sort_moves(board, player, moves)
+        best_move, _ = self._iterative_deepening(board, root_moves)
+        best_depth = self.max_depth_reached
+
+        # Stop the helpers and take the deepest iteration anybody completed
+        self.result_source = 'main'
+        helper_results = {}
+        for worker_id, depth, move, _, nodes in self._pool.end_search(wait=0.05):
+            helper_results[worker_id] = nodes
+            if depth > best_depth and move in moves:
+                best_depth = depth
+                best_move = move
+                self.result_source = f'helper {worker_id}'
+        self.helper_nodes = sum(helper_results.values())
+        self.max_depth_reached = best_depth
+        return best_move
+
+    def search_report(self, move: Optional[int] = None) -> dict:
+        """Minmax.search_report plus the nodes searched by the helper processes"""
+        report = super().search_report(move)
+        report['helper_nodes'] = self.helper_nodes
+        return report
+
+    # -------------- Helper processes --------------
+
+    def close(self):
+        """Stop the helpers and free the shared table; the engine can't search afterwards"""
+        if self._shm is None:
+            return
+        self._pool.close()
+        self.transposition_table.release()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
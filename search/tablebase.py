@@ -0,0 +1,234 @@
+"""
+Pawn-endgame tablebase.
+
+Every position with up to `max_pawns` pawns per side is solved exactly. There
+are no draws in Two Flags and every move raises the position's progress (see
+game.rules.progress), so the positions of one material class can be solved
+backwards: from the highest progress down, each position's moves only lead
+to positions already solved (or to fewer pawns, solved before this class).
+
+File layout: an 8-byte header (b'TFTB', version, max_pawns, 2 spare bytes),
+then one byte per position for each material class (white pawns, black
+pawns) in order (1, 1), (1, 2), ... (max_pawns, max_pawns). A byte is 0 for
+no entry, otherwise 1 + (distance << 1 | win): whether the side to move wins
+and in how many plies the game ends with best play (the winner hurrying, the
+loser holding out).
+
+Within a class a position's index is
+    (index of the white squares * C(48, black pawns) + index of the black squares) * 2 + side
+where a set of squares is indexed by the combinatorial number system over
+rows 1-6 (a pawn on row 0 or 7 has already decided the game). Positions in
+which en passant can be taken are not stored; the search goes one ply deeper
+there.
+"""
+
+import mmap
+import os
+
+from game import rules
+from game.bitboard import ROW_MASKS, popcount, en_passant_capturable
+
+MAGIC = b'TFTB'
+VERSION = 1
+HEADER_BYTES = 8
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tables', 'pawns.tb')
+
+_SQUARES = 48  # Rows 1-6
+_FIRST_SQUARE = 8
+_EDGE_ROWS = ROW_MASKS[0] | ROW_MASKS[7]
+_MAX_DISTANCE = 126
+
+# _BINOMIAL[n][k] = C(n, k) for the combinatorial number system
+_BINOMIAL = [[0] * 9 for _ in range(_SQUARES + 1)]
+for _n in range(_SQUARES + 1):
+    _BINOMIAL[_n][0] = 1
+    for _k in range(1, min(_n, 8) + 1):
+        _BINOMIAL[_n][_k] = _BINOMIAL[_n - 1][_k - 1] + (_BINOMIAL[_n - 1][_k] if _k < _n else 0)
+del _n, _k
+
+
+def _square_set_index(pawns):
+    """Index of a set of squares on rows 1-6 among all sets of its size"""
+    index = 0
+    i = 1
+    while pawns:
+        lsb = pawns & -pawns
+        index += _BINOMIAL[lsb.bit_length() - 1 - _FIRST_SQUARE][i]
+        pawns ^= lsb
+        i += 1
+    return index
+
+
+def _class_layout(max_pawns):
+    """{(white pawns, black pawns): (offset, size)} with offsets from the start of the file"""
+    layout = {}
+    offset = HEADER_BYTES
+    for white_count in range(1, max_pawns + 1):
+        for black_count in range(1, max_pawns + 1):
+            size = _BINOMIAL[_SQUARES][white_count] * _BINOMIAL[_SQUARES][black_count] * 2
+            layout[white_count, black_count] = (offset, size)
+            offset += size
+    return layout
+
+
+def _position_index(white, black, side_to_move, black_count):
+    return ((_square_set_index(white) * _BINOMIAL[_SQUARES][black_count] + _square_set_index(black)) << 1
+            | (side_to_move == 'B'))
+
+
+class Tablebase:
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Memory-map a tablebase file built by build_tablebase.py. Only the
+        header is read here; probes read single bytes from the mapping.
+
+        :raises OSError: If the file can't be opened
+        :raises ValueError: If the file is not a tablebase of this version
+        """
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._data[:HEADER_BYTES]
+        if header[:4] != MAGIC or header[4] != VERSION:
+            self._data.close()
+            raise ValueError(f"{path} is not a version {VERSION} tablebase")
+        self.path = path
+        self.max_pawns = header[5]
+        self._offsets = {material: offset for material, (offset, _) in _class_layout(self.max_pawns).items()}
+        self.probes = 0
+        self.hits = 0
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """The tablebase at `path`, or None if there is none (the engines run without one)"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"[Tablebase] Not using {path}: {e}")
+            return None
+
+    def close(self):
+        self._data.close()
+
+    def probe(self, position):
+        """
+        Look up a ChessBoard or Position.
+
+        :return: (win, distance) for the side to move, distance being the
+                 plies until the game ends with best play; None if the
+                 position is not in the table
+        """
+        white = position.white
+        black = position.black
+        white_count = popcount(white)
+        black_count = popcount(black)
+        max_pawns = self.max_pawns
+        if not (0 < white_count <= max_pawns and 0 < black_count <= max_pawns) or (white | black) & _EDGE_ROWS:
+            return None
+        side = position.side_to_move
+        ep_square = position.ep_square
+        if ep_square is not None and en_passant_capturable(white if side == 'W' else black, ep_square, side):
+            return None
+        self.probes += 1
+        entry = self._data[self._offsets[white_count, black_count]
+                           + _position_index(white, black, side, black_count)]
+        if not entry:
+            return None
+        self.hits += 1
+        entry -= 1
+        return bool(entry & 1), entry >> 1
+
+
+# -------------- Generation --------------
+
+class _Solver:
+    """Retrograde solver filling one byte array per material class"""
+
+    def __init__(self, max_pawns):
+        self.layout = _class_layout(max_pawns)
+        self.tables = {}
+        self.ep_values = {}  # Positions with en passant to take, solved on demand
+
+    def value(self, white, black, side, ep_square):
+        """(win, distance) for the side to move; every position it can reach must be solved already"""
+        status = rules.winner(white, black, side, ep_square)
+        if status is not None:
+            return status == side, 0
+        if ep_square is not None and en_passant_capturable(white if side == 'W' else black, ep_square, side):
+            key = (white, black, side, ep_square)
+            value = self.ep_values.get(key)
+            if value is None:
+                value = self.ep_values[key] = self.solve(white, black, side, ep_square)
+            return value
+        entry = self.tables[popcount(white), popcount(black)][
+            _position_index(white, black, side, popcount(black))] - 1
+        return bool(entry & 1), entry >> 1
+
+    def solve(self, white, black, side, ep_square=None):
+        """Best result over all moves: the quickest win, else the slowest loss"""
+        win_distance = None
+        loss_distance = -1
+        for move in rules.generate_moves(white, black, ep_square, side):
+            child_wins, distance = self.value(*rules.play(white, black, side, ep_square, 0, move)[:4])
+            if not child_wins:
+                if win_distance is None or distance < win_distance:
+                    win_distance = distance
+            elif win_distance is None and distance > loss_distance:
+                loss_distance = distance
+        if win_distance is not None:
+            return True, win_distance + 1
+        return False, loss_distance + 1
+
+    def solve_class(self, white_count, black_count):
+        from itertools import combinations
+        _, size = self.layout[white_count, black_count]
+        table = bytearray(size)
+        self.tables[white_count, black_count] = table
+
+        square_sets = {}
+        for count in {white_count, black_count}:
+            square_sets[count] = [sum(1 << (sq + _FIRST_SQUARE) for sq in squares)
+                                  for squares in combinations(range(_SQUARES), count)]
+        positions = [(rules.progress(white, black), white, black)
+                     for white in square_sets[white_count]
+                     for black in square_sets[black_count] if not white & black]
+        # Highest progress first: every move raises progress, so whatever a
+        # position can reach in this class has been solved before it
+        positions.sort(reverse=True)
+        for _, white, black in positions:
+            for side in ('W', 'B'):
+                status = rules.winner(white, black, side, None)
+                if status is not None:
+                    win, distance = status == side, 0
+                else:
+                    win, distance = self.solve(white, black, side)
+                table[_position_index(white, black, side, black_count)] = 1 + (min(distance, _MAX_DISTANCE) << 1 | win)
+        self.ep_values.clear()
+
+
+def generate(path, max_pawns=2, progress=None):
+    """
+    Solve every position with 1 to `max_pawns` pawns per side and write the
+    tablebase file. Classes are solved fewest pawns first, so captures always
+    lead into a finished class.
+
+    :param progress: Optional callable(white pawns, black pawns) called as each class starts
+    """
+    solver = _Solver(max_pawns)
+    for total in range(2, 2 * max_pawns + 1):
+        for white_count in range(1, max_pawns + 1):
+            black_count = total - white_count
+            if 1 <= black_count <= max_pawns:
+                if progress is not None:
+                    progress(white_count, black_count)
+                solver.solve_class(white_count, black_count)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(MAGIC + bytes([VERSION, max_pawns, 0, 0]))
+        for material in sorted(solver.layout, key=lambda m: solver.layout[m][0]):
+            f.write(solver.tables[material])
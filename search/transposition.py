@@ -0,0 +1,214 @@
+"""
+Fixed-size transposition table.
+
+Entries live in flat typed arrays (memoryview casts over one byte buffer), so
+the table never grows past its budget, holds no Python objects per entry and
+can be placed in any buffer, e.g. shared memory used by several processes.
+Each bucket has two slots: a depth-preferred one and an always-replace one.
+
+The table lives across searches and games. Every slot also records the
+position's progress (game.rules.progress), which only grows as the game goes
+on: entries below the current root's progress can never be reached again and
+are the first to be overwritten, while the rest of the previous search's tree
+stays in place for the next one.
+
+Slots are written without locks. The stored key is XORed with the data word
+and the score's bits, so a slot torn by two processes writing at once no
+longer matches its position and reads as a miss.
+"""
+
+# Bound types
+EXACT = 0
+LOWER_BOUND = 1  # Search failed high: the true value is >= the stored score
+UPPER_BOUND = 2  # Search failed low: the true value is <= the stored score
+
+# Bytes per slot: 8 (key) + 8 (score) + 4 (packed data) + 2 (progress)
+ENTRY_BYTES = 22
+
+# Packed data word: move (15 bits) | depth (8) | bound (2) | generation (6) | valid (1)
+_MOVE_MASK = 0x7FFF
+_DEPTH_SHIFT = 15
+_BOUND_SHIFT = 23
+_GENERATION_SHIFT = 25
+_GENERATION_BITS = 6
+_GENERATION_MASK = (1 << _GENERATION_BITS) - 1
+_VALID_SHIFT = 31
+_VALID = 1 << _VALID_SHIFT  # Set on every stored slot so an all-zero slot reads as empty
+
+# The generation wraps inside its own field and must never reach the valid bit
+assert _GENERATION_SHIFT + _GENERATION_BITS <= _VALID_SHIFT
+
+
+def slots_for_size(size_mb):
+    """Number of slots (a power of two, at least 2) that fit in `size_mb` megabytes"""
+    slots = 2
+    while slots * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+        slots *= 2
+    return slots
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        """
+        :param size_mb: Memory budget in megabytes
+        :param buffer: Optional writable buffer to hold the table; it must be
+                       at least slots_for_size(size_mb) * ENTRY_BYTES bytes
+        """
+        self.slots = slots_for_size(size_mb)
+        self.bucket_mask = (self.slots >> 1) - 1
+        size = self.slots * ENTRY_BYTES
+        if buffer is None:
+            buffer = bytearray(size)
+        elif len(buffer) < size:
+            raise ValueError(f"buffer holds {len(buffer)} bytes, {size} needed")
+        self.buffer = buffer
+
+        view = memoryview(buffer)
+        keys_end = self.slots * 8
+        scores_end = keys_end * 2
+        data_end = scores_end + self.slots * 4
+        self.keys = view[:keys_end].cast('Q')
+        self.scores = view[keys_end:scores_end].cast('d')
+        self.score_bits = view[keys_end:scores_end].cast('Q')
+        self.data = view[scores_end:data_end].cast('I')
+        self.progress = view[data_end:size].cast('H')
+
+        self.generation = 0
+        # Progress of the current root; entries below it are unreachable
+        self.min_progress = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def release(self):
+        """Drop the views into the buffer (needed before closing shared memory)"""
+        for view in (self.keys, self.scores, self.score_bits, self.data, self.progress):
+            view.release()
+
+    def __len__(self):
+        return self.slots
+
+    def size_mb(self):
+        return self.slots * ENTRY_BYTES / (1024 * 1024)
+
+    def clear(self):
+        """Empty the table and reset the statistics"""
+        view = memoryview(self.buffer)
+        view[:self.slots * ENTRY_BYTES] = bytes(self.slots * ENTRY_BYTES)
+        self.generation = 0
+        self.min_progress = 0
+        self.reset_stats()
+
+    def new_search(self, root_progress=0):
+        """
+        Start a new search from a root with the given progress: entries the
+        root can no longer reach become free slots
+        """
+        self.generation = (self.generation + 1) & _GENERATION_MASK
+        self.min_progress = root_progress
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        :return: (depth, bound, score, move) or None; move is 0 if none was stored
+        """
+        self.probes += 1
+        slot = (key & self.bucket_mask) << 1
+        keys = self.keys
+        data = self.data
+        score_bits = self.score_bits
+        word = data[slot]
+        if keys[slot] ^ word ^ score_bits[slot] != key:
+            slot += 1
+            word = data[slot]
+            if keys[slot] ^ word ^ score_bits[slot] != key:
+                return None
+        if not word & _VALID:
+            return None
+        self.hits += 1
+        return ((word >> _DEPTH_SHIFT) & 0xFF, (word >> _BOUND_SHIFT) & 3,
+                self.scores[slot], word & _MOVE_MASK)
+
+    def store(self, key, depth, bound, score, move=0, progress=0):
+        """
+        Save a search result for a position with the given progress. The first
+        slot of the bucket keeps the deepest result that is still reachable;
+        everything else goes to the second slot.
+        """
+        self.stores += 1
+        slot = (key & self.bucket_mask) << 1
+        keys = self.keys
+        scores = self.scores
+        score_bits = self.score_bits
+        data = self.data
+        progresses = self.progress
+        old = data[slot]
+        if depth < 0:
+            depth = 0
+        if keys[slot] ^ old ^ score_bits[slot] == key:
+            if not move and old & _VALID:
+                # Keep the best move of an earlier visit when this one found none
+                move = old & _MOVE_MASK
+        elif old & _VALID and progresses[slot] >= self.min_progress:
+            if (old >> _DEPTH_SHIFT) & 0xFF > depth:
+                slot += 1
+            else:
+                # Deeper result: the old one moves to the always-replace slot
+                keys[slot + 1] = keys[slot]
+                scores[slot + 1] = scores[slot]
+                data[slot + 1] = old
+                progresses[slot + 1] = progresses[slot]
+        word = (_VALID | (move & _MOVE_MASK) | (min(depth, 0xFF) << _DEPTH_SHIFT)
+                | (bound << _BOUND_SHIFT) | (self.generation << _GENERATION_SHIFT))
+        scores[slot] = score
+        data[slot] = word
+        progresses[slot] = progress
+        keys[slot] = key ^ word ^ score_bits[slot]
+
+    # -------------- Statistics --------------
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def hit_rate(self):
+        """Fraction of probes that found their position"""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self, sample=1000):
+        """Fraction of slots holding an entry from the current search, estimated from the first `sample` slots"""
+        sample = min(sample, self.slots)
+        data = self.data
+        used = 0
+        for slot in range(sample):
+            word = data[slot]
+            if word & _VALID and (word >> _GENERATION_SHIFT) & _GENERATION_MASK == self.generation:
+                used += 1
+        return used / sample
+
+    def live(self, sample=1000):
+        """Fraction of slots the current root can still reach, estimated from the first `sample` slots"""
+        sample = min(sample, self.slots)
+        data = self.data
+        progresses = self.progress
+        min_progress = self.min_progress
+        used = 0
+        for slot in range(sample):
+            if data[slot] & _VALID and progresses[slot] >= min_progress:
+                used += 1
+        return used / sample
+
+    def stats(self):
+        """Counters since the last reset, plus hit rate and fill"""
+        return {
+            'size_mb': round(self.size_mb(), 2),
+            'slots': self.slots,
+            'probes': self.probes,
+            'hits': self.hits,
+            'stores': self.stores,
+            'hit_rate': round(self.hit_rate(), 4),
+            'fill': round(self.fill(), 4),
+            'live': round(self.live(), 4),
+        }
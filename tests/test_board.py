@@ -0,0 +1,34 @@
+from game.board import ChessBoard, STANDARD_SETUP
+
+
+def _snapshot(board):
+    return (board.white, board.black, board.side_to_move, board.ep_square,
+            board.zobrist_key, dict(board.pawn_counts), len(board.move_history))
+
+
+def test_compute_move_refuses_diagonal_onto_empty_square():
+    board = ChessBoard()
+    board.load_setup(STANDARD_SETUP)
+    before = _snapshot(board)
+    # a2 -> b3: nothing to capture and no en passant square
+    assert board.computeMove((6, 0, 5, 1), 'W') is False
+    assert _snapshot(board) == before
+
+
+def test_compute_move_refuses_illegal_double_push():
+    board = ChessBoard()
+    board.load_setup("Wa3 Wb2 Bb3 Bh7")
+    before = _snapshot(board)
+    # a3 -> a5: not on the starting row
+    assert board.computeMove((5, 0, 3, 0), 'W') is False
+    # b2 -> b4: jumps over the pawn on b3
+    assert board.computeMove((6, 1, 4, 1), 'W') is False
+    assert _snapshot(board) == before
+
+
+def test_compute_move_plays_legal_move():
+    board = ChessBoard()
+    board.load_setup(STANDARD_SETUP)
+    assert board.computeMove((6, 0, 4, 0), 'W') is True
+    assert board.boardArray[4][0] == 'W'
+    assert board.ep_square == 5 * 8
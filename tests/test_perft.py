@@ -0,0 +1,101 @@
+import functools
+import random
+
+import pytest
+
+from game.board import ChessBoard, STANDARD_SETUP
+from game.state import Position
+from game.zobrist import compute_key
+from perft import perft, find_divergence, board_moves, mailbox_moves
+from search.tablebase import Tablebase, generate
+
+# Positions reachable from the standard setup after 1..5 plies
+STANDARD_PERFT = [16, 256, 3846, 57744, 815968]
+
+
+def _board(setup=STANDARD_SETUP, player='W'):
+    board = ChessBoard()
+    board.load_setup(setup)
+    board.set_side_to_move(player)
+    return board
+
+
+@pytest.mark.parametrize("depth, nodes", list(enumerate(STANDARD_PERFT, start=1)))
+def test_standard_perft(depth, nodes):
+    assert perft(_board(), 'W', depth) == nodes
+
+
+@pytest.mark.parametrize("setup", [
+    STANDARD_SETUP,
+    "Wa2 Wb4 Bc4 Bh7",  # En passant on the first move
+    "Wb5 We2 Wg6 Ba7 Bc7 Bf4 Bh7",
+])
+def test_generator_matches_mailbox_reference(setup):
+    assert find_divergence(_board(setup), 'W', 4, board_moves, mailbox_moves) is None
+
+
+def _state(board):
+    return (board.white, board.black, board.side_to_move, board.ep_square,
+            board.zobrist_key, dict(board.pawn_counts), board.last_move)
+
+
+def test_make_unmake_round_trip_and_keys():
+    rng = random.Random(7)
+    for _ in range(100):
+        board = _board()
+        position = board.to_position()
+        undo_stack = []
+        states = []
+        while board.terminal_status() is None:
+            player = board.side_to_move
+            move = rng.choice(board.generate_moves(player))
+            states.append(_state(board))
+            undo_stack.append(board.make_move(move, player))
+            position = position.play(move)
+
+            # The incremental key, the counts and Position.play agree with a fresh computation
+            assert board.zobrist_key == compute_key(board.white, board.black, board.side_to_move, board.ep_square)
+            assert board.pawn_counts == {'W': bin(board.white).count('1'), 'B': bin(board.black).count('1')}
+            assert position == board.to_position()
+            assert position.key == board.zobrist_key
+
+        while undo_stack:
+            board.unmake_move(undo_stack.pop())
+            assert _state(board) == states.pop()
+
+
+@pytest.fixture(scope="module")
+def one_pawn_tablebase(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tables") / "pawns1.tb"
+    generate(str(path), 1)
+    tablebase = Tablebase(str(path))
+    yield tablebase
+    tablebase.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _solve(position):
+    """(win, distance) for the side to move by plain search to the end of the game"""
+    winner = position.terminal_status()
+    if winner is not None:
+        return winner == position.side_to_move, 0
+    quickest_win = None
+    slowest_loss = -1
+    for move in position.generate_moves():
+        child_wins, distance = _solve(position.play(move))
+        if not child_wins:
+            quickest_win = distance if quickest_win is None else min(quickest_win, distance)
+        else:
+            slowest_loss = max(slowest_loss, distance)
+    if quickest_win is not None:
+        return True, quickest_win + 1
+    return False, slowest_loss + 1
+
+
+def test_tablebase_probes_match_search(one_pawn_tablebase):
+    rng = random.Random(3)
+    squares = range(8, 56)  # Pawns off the goal rows
+    for _ in range(500):
+        white_sq, black_sq = rng.sample(squares, 2)
+        position = Position(1 << white_sq, 1 << black_sq, rng.choice('WB'))
+        assert one_pawn_tablebase.probe(position) == _solve(position)
@@ -0,0 +1,23 @@
+from search.transposition import TranspositionTable, EXACT, LOWER_BOUND
+
+
+def test_generation_never_clears_valid_bit():
+    table = TranspositionTable(1)
+    # Run the generation counter through a full wrap of its field
+    for _ in range(200):
+        table.new_search()
+        table.store(12345, 3, EXACT, 1.5, 7)
+        assert table.probe(12345) == (3, EXACT, 1.5, 7)
+        assert table.fill(sample=table.slots) > 0
+
+
+def test_deeper_entry_keeps_first_slot():
+    table = TranspositionTable(1)
+    bucket_stride = table.bucket_mask + 1
+    deep, shallow = 5, 5 + bucket_stride  # Same bucket, different keys
+    table.new_search()
+    table.store(deep, 8, LOWER_BOUND, 10.0, 1)
+    table.new_search()
+    table.store(shallow, 2, EXACT, -3.0, 2)
+    assert table.probe(deep) == (8, LOWER_BOUND, 10.0, 1)
+    assert table.probe(shallow) == (2, EXACT, -3.0, 2)